@@ -7,6 +7,17 @@ Code Examples for Mastering Object-Oriented Python 2nd Edition
 Chapter 1. Example 3.
 """
 
+from functools import lru_cache
+import sys
+import timeit
+from typing import Tuple
+
+try:
+    from numba import njit  # type: ignore
+except ImportError:
+    njit = None
+
+@lru_cache(maxsize=None)
 def F(n: int) -> int:
     if n in (0, 1):
         return 1
@@ -18,12 +29,73 @@ test_F_8 = """
     34
 """
 
+# The un-memoized recursion, the canonical benchmark of call overhead.
+# When numba is installed, a native-code version is compiled from it;
+# the recursive calls stay in native code, with no Python frames.
+
+def F_recursive(n: int) -> int:
+    if n in (0, 1):
+        return 1
+    else:
+        return F_recursive(n-1) + F_recursive(n-2)
+
+if njit is not None:
+    F_jit = njit("int64(int64)", cache=True)(F_recursive)
+else:
+    F_jit = None
+
+test_F_recursive_8 = """
+    >>> F_recursive(8)
+    34
+"""
+
+# A better algorithm beats any amount of caching. Fast doubling
+# computes the sequence in O(log n) steps, using the identities
+# fib(2k) = fib(k) * (2*fib(k+1) - fib(k)) and
+# fib(2k+1) = fib(k+1)**2 + fib(k)**2, where fib(0) = 0, fib(1) = 1.
+# Note that F(n) == fib(n+1).
+
+def _fib_pair(n: int) -> Tuple[int, int]:
+    """Return (fib(n), fib(n+1))."""
+    if n == 0:
+        return 0, 1
+    a, b = _fib_pair(n >> 1)
+    c = a * (2*b - a)
+    d = a*a + b*b
+    if n & 1:
+        return d, c + d
+    return c, d
+
+def F_fast(n: int) -> int:
+    return _fib_pair(n)[1]
+
+test_F_fast = """
+    >>> F_fast(8)
+    34
+    >>> all(F_fast(n) == F(n) for n in range(100))
+    True
+"""
+
 def demo():
     print("Good Use", F(8))
+    print("Fast Use", f"F_fast(10_000) has {len(str(F_fast(10_000)))} digits")
     print("Bad Use", F(355/113))
 
+def benchmark(n: int = 35) -> None:
+    python_time = timeit.timeit(lambda: F_recursive(n), number=1)
+    print(f"Python F({n}) {python_time:.4f}")
+    if F_jit is None:
+        print("numba is not installed")
+        return
+    F_jit(n)  # Make sure compilation isn't part of the timing.
+    jit_time = timeit.timeit(lambda: F_jit(n), number=1)
+    print(f"Numba  F({n}) {jit_time:.4f}")
+
 __test__ = {name: value for name, value in locals().items() if name.startswith("test_")}
 
 if __name__ == "__main__":
     import doctest
     doctest.testmod(verbose=False)
+
+    if "--jit" in sys.argv[1:]:
+        benchmark()
@@ -10,21 +10,21 @@ Chapter 1. Example 4.
 
 # Simple function with docstring.
 
+import math
+
 def factorial(n: int) -> int:
-    """Compute n! recursively.
+    """Compute n!.
 
     :param n: an integer >= 0
     :returns: n!
 
-    Because of Python's stack limitation, this won't
-    compute a value larger than about 1000!.
+    This delegates to :func:`math.factorial`, so it isn't
+    limited by Python's recursion depth.
 
     >>> factorial(5)
     120
     """
-    if n == 0:
-        return 1
-    return n * factorial(n - 1)
+    return math.factorial(n)
 
 
 if __name__ == "__main__":
@@ -18,34 +18,21 @@ EmptyClass2 = SimpleNamespace
 
 EmptyClass3 = type('EmptyClass3', (object,), {})
 
+# The same doctest applies to each of the three definitions.
+
+empty_class_test = '''
+    >>> ec = {cls}()
+    >>> ec.new_attribute = 42
+    >>> ec.new_attribute
+    42
+    >>> ec.undefined  # doctest: +IGNORE_EXCEPTION_DETAIL
+    Traceback (most recent call last):
+    AttributeError: '{cls}' object has no attribute 'undefined'
+    '''
+
 __test__ = {
-    'EmptyClass': '''
-        >>> ec = EmptyClass()
-        >>> ec.new_attribute = 42
-        >>> ec.new_attribute
-        42
-        >>> ec.undefined  # doctest: +IGNORE_EXCEPTION_DETAIL
-        Traceback (most recent call last):
-        AttributeError: 'EmptyClass' object has no attribute 'undefined'
-        ''',
-    'EmptyClass2': '''
-        >>> ec = EmptyClass2()
-        >>> ec.new_attribute = 42
-        >>> ec.new_attribute
-        42
-        >>> ec.undefined  # doctest: +IGNORE_EXCEPTION_DETAIL
-        Traceback (most recent call last):
-        AttributeError: 'EmptyClass' object has no attribute 'undefined'
-        ''',
-    'EmptyClass3': '''
-        >>> ec = EmptyClass3()
-        >>> ec.new_attribute = 42
-        >>> ec.new_attribute
-        42
-        >>> ec.undefined  # doctest: +IGNORE_EXCEPTION_DETAIL
-        Traceback (most recent call last):
-        AttributeError: 'EmptyClass' object has no attribute 'undefined'
-        ''',
+    name: empty_class_test.format(cls=name)
+    for name in ('EmptyClass', 'EmptyClass2', 'EmptyClass3')
 }
 
 if __name__ == "__main__":
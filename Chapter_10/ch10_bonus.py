@@ -9,10 +9,17 @@ Then bust for player is rule 1.
 Bust for dealer is rule 2.
 Otherwise it's a 50/50 proposition.
 """
-from typing import Optional, Tuple, Dict, Counter
+from typing import Optional, Tuple, Dict, Counter, List, DefaultDict
 import random
+from dataclasses import dataclass, field
 from enum import Enum
 import collections
+from operator import attrgetter
+
+try:
+    import numpy as np
+except ImportError:
+    np = None  # type: ignore
 
 class Suit(Enum):
     Clubs = "♣"
@@ -21,6 +28,7 @@ class Suit(Enum):
     Spades = "♠"
 
 class Card:
+    __slots__ = ("rank", "suit", "hard", "soft")
 
     def __init__(self, rank: str, suit: Suit, hard: Optional[int]=None, soft: Optional[int]=None) -> None:
         self.rank = rank
@@ -33,61 +41,87 @@ class Card:
 
 
 class AceCard(Card):
+    __slots__ = ()
 
     def __init__(self, rank: str, suit: Suit) -> None:
         super().__init__(rank, suit, 1, 11)
 
 
 class FaceCard(Card):
+    __slots__ = ()
 
     def __init__(self, rank: str, suit: Suit) -> None:
         super().__init__(rank, suit, 10, 10)
 
+FACE_NAMES: Dict[int, str] = {11: "J", 12: "Q", 13: "K"}
+
 def card(rank: int, suit: Suit) -> Card:
     if rank == 1:
         return AceCard("A", suit)
-    elif rank in (11, 12, 13):
-        rank_str = {11: "J", 12: "Q", 13: "K"}[rank]
-        return FaceCard(rank_str, suit)
+    elif rank in FACE_NAMES:
+        return FaceCard(FACE_NAMES[rank], suit)
     else:
         return Card(str(rank), suit)
 
-class Deck(list):
+# The simulation only needs each card's hard and soft points.
+# Rather than a list of Card objects, a deck and a hand are lists of
+# card ids, and the points are parallel tuples indexed by id.
+
+CARDS: Tuple[Card, ...] = tuple(card(r, s) for r in range(1, 14) for s in Suit)
+HARD: Tuple[int, ...] = tuple(map(attrgetter("hard"), CARDS))
+SOFT: Tuple[int, ...] = tuple(map(attrgetter("soft"), CARDS))
+
+class Deck(List[int]):
+    """The card ids not yet dealt; see :data:`CARDS`.
+
+    The deck isn't shuffled up front, so the order of the list means
+    nothing. Rather than shuffle all 52 cards, each :meth:`deal` picks a
+    random card from those remaining. This is one step of a Fisher-Yates
+    shuffle per card drawn, and a hand rarely draws more than a few cards.
+    """
     def __init__(self) -> None:
-        super().__init__(card(r, s) for r in range(1, 14) for s in Suit)
-        random.shuffle(self)
+        super().__init__(range(len(CARDS)))
 
-class Hand(list):
-    @property
-    def hard(self) -> int:
-        return sum(c.hard for c in self)
+    def deal(self) -> int:
+        i = random.randrange(len(self))
+        self[i], self[-1] = self[-1], self[i]
+        return self.pop()
 
-    @property
-    def soft(self) -> int:
-        return sum(c.soft for c in self)
+@dataclass
+class Hand:
+    """Card ids with the totals of their hard and soft points."""
+    cards: List[int] = field(default_factory=list)
+    hard_sum: int = 0
+    soft_sum: int = 0
 
     def __repr__(self) -> str:
-        cards = [str(c) for c in self]
+        cards = [str(CARDS[c]) for c in self.cards]
         return f"Hand({cards!r})"
 
 def deal_rules(deck: Deck) -> Tuple[Hand, Optional[int]]:
-    hand = Hand([deck.pop(), deck.pop()])
-    while hand.hard < 21:
-        if hand.soft == 21:
-            return hand, 21
-        elif hand.hard == 21:
-            return hand, 21
-        elif hand.soft < 18:
-            hand.append(deck.pop())
-        elif hand.soft > 21 and hand.hard < 18:
-            hand.append(deck.pop())
+    # The hard and soft totals are kept in local variables; the Hand
+    # is only built once the dealer rules have finished.
+    cards = [deck.deal(), deck.deal()]
+    hard = HARD[cards[0]] + HARD[cards[1]]
+    soft = SOFT[cards[0]] + SOFT[cards[1]]
+    result: Optional[int] = None
+    while hard < 21:
+        if soft == 21 or hard == 21:
+            result = 21
+            break
+        elif soft < 18 or (soft > 21 and hard < 18):
+            card_id = deck.deal()
+            cards.append(card_id)
+            hard += HARD[card_id]
+            soft += SOFT[card_id]
         else:
-            return hand, min(hand.hard, hand.soft)
-    return hand, None
+            result = min(hard, soft)
+            break
+    return Hand(cards, hard, soft), result
 
 def simulation() -> None:
-    raw_outcomes: Counter[Tuple[Optional[int], Optional[int]]] = collections.Counter()
-    game_payout: Counter[str] = collections.Counter()
+    raw_outcomes: DefaultDict[Tuple[Optional[int], Optional[int]], int] = collections.defaultdict(int)
+    loss = win = push = twenty_one = 0
 
     for i in range(20_000):
         deck = Deck()
@@ -95,25 +129,108 @@ def simulation() -> None:
         dealer_hand, dealer_result = deal_rules(deck)
         raw_outcomes[(player_result, dealer_result)] += 1
         if player_result is None:
-            game_payout['loss'] += 1
-        elif player_result is 21:
-            game_payout['21'] += 1
+            loss += 1
+        elif player_result == 21:
+            twenty_one += 1
         elif dealer_result is None:
-            game_payout['win'] += 1
+            win += 1
         elif player_result > dealer_result:
-            game_payout['win'] += 1
+            win += 1
         elif player_result == dealer_result:
-            game_payout['push'] += 1
+            push += 1
         else:
-            game_payout['loss'] += 1
+            loss += 1
+
+    game_payout: Counter[str] = collections.Counter(
+        {'loss': loss, '21': twenty_one, 'win': win, 'push': push}
+    )
+    report(game_payout, 20_000)
 
+def report(game_payout: Counter[str], trials: int) -> None:
     running = 0.0
     for outcome, count in game_payout.most_common():
-        print(f"{running:.3f} <= r < {running+count/20_000:.3f}: {outcome}")
-        running += count/20_000
+        print(f"{running:.3f} <= r < {running+count/trials:.3f}: {outcome}")
+        running += count/trials
+
+# With numpy, all of the trials can be dealt at once. Each row of ``decks``
+# is one shuffled deck. Each pass of the loop in ``deal_rules_vectorized``
+# applies one step of the dealer rules to all of the hands still in play.
+# A result of 0 means the hand went bust.
+
+def deal_rules_vectorized(decks: "np.ndarray", position: "np.ndarray") -> Tuple["np.ndarray", "np.ndarray"]:
+    hard_points = np.array(HARD, dtype=np.int16)
+    soft_points = np.array(SOFT, dtype=np.int16)
+    rows = np.arange(len(decks))
+    position = position.copy()
+    hard = hard_points[decks[rows, position]] + hard_points[decks[rows, position+1]]
+    soft = soft_points[decks[rows, position]] + soft_points[decks[rows, position+1]]
+    position += 2
+    result = np.zeros(len(decks), dtype=np.int16)
+    active = np.ones(len(decks), dtype=bool)
+    while active.any():
+        active &= hard < 21
+        twenty_one = active & ((soft == 21) | (hard == 21))
+        result[twenty_one] = 21
+        active &= ~twenty_one
+        hit = active & ((soft < 18) | ((soft > 21) & (hard < 18)))
+        stand = active & ~hit
+        result[stand] = np.minimum(hard, soft)[stand]
+        active = hit
+        dealt = decks[rows[hit], position[hit]]
+        hard[hit] += hard_points[dealt]
+        soft[hit] += soft_points[dealt]
+        position[hit] += 1
+    return result, position
+
+def simulation_vectorized(trials: int = 20_000) -> None:
+    rng = np.random.default_rng()
+    decks = rng.permuted(np.tile(np.arange(len(CARDS)), (trials, 1)), axis=1)
+    player_result, position = deal_rules_vectorized(decks, np.zeros(trials, dtype=int))
+    dealer_result, _ = deal_rules_vectorized(decks, position)
+
+    loss = player_result == 0
+    twenty_one = ~loss & (player_result == 21)
+    undecided = ~loss & ~twenty_one
+    win = undecided & ((dealer_result == 0) | (player_result > dealer_result))
+    push = undecided & ~win & (player_result == dealer_result)
+    loss |= undecided & ~win & ~push
+
+    game_payout: Counter[str] = collections.Counter(
+        {'loss': int(loss.sum()), '21': int(twenty_one.sum()), 'win': int(win.sum()), 'push': int(push.sum())}
+    )
+    report(game_payout, trials)
+
+# Both versions of the dealer rules, given the same deck orders, must reach
+# the same results. A StackedDeck deals its cards in their list order.
+if np is not None:
+    test_deal_rules_vectorized = """
+    >>> class StackedDeck(list):
+    ...     def deal(self):
+    ...         return self.pop(0)
+    >>> orders = [random.Random(seed).sample(range(len(CARDS)), len(CARDS)) for seed in range(500)]
+    >>> expected = []
+    >>> for order in orders:
+    ...     deck = StackedDeck(order)
+    ...     player_hand, player_result = deal_rules(deck)
+    ...     dealer_hand, dealer_result = deal_rules(deck)
+    ...     expected.append((player_result or 0, dealer_result or 0))
+
+    >>> decks = np.array(orders)
+    >>> player_result, position = deal_rules_vectorized(decks, np.zeros(len(decks), dtype=int))
+    >>> dealer_result, _ = deal_rules_vectorized(decks, position)
+    >>> list(zip(player_result.tolist(), dealer_result.tolist())) == expected
+    True
+    >>> len(set(expected)) > 20
+    True
+    """
+
+__test__ = {name: value for name, value in locals().items() if name.startswith("test_")}
 
 if __name__ == "__main__":
     import doctest
     doctest.testmod()
 
-    simulation()
+    if np is None:
+        simulation()
+    else:
+        simulation_vectorized()
@@ -11,29 +11,66 @@ Chapter 10. Example 1. JSON
 # ========================================
 
 # A detail class for micro-blog posts
-from typing import List, Optional, Dict, Any, DefaultDict, Union, Type
+from typing import List, Optional, Dict, Any, DefaultDict, Union, Type, Iterator, Callable, Sequence, TYPE_CHECKING
 from pathlib import Path
 import datetime
-from dataclasses import dataclass
+import sys
+from dataclasses import dataclass, field
 
 # Technically, this is the type supported by JSON serailization.
 # JSON = Union[Dict[str, 'JSON'], List['JSON'], int, str, float, bool, Type[None]]
 JSON = Union[Dict[str, Any], List[Any], int, str, float, bool, Type[None]]
 
-@dataclass
+@dataclass(frozen=True)
 class Post:
+    __slots__ = ("date", "title", "rst_text", "tags", "_underline", "_tag_text")
+
     date: datetime.datetime
     title: str
     rst_text: str
-    tags: List[str]
+    tags: Sequence[str]
+
+    # The derived slots, declared for the type checker only: at run time
+    # a class-level field() would conflict with __slots__.
+    if TYPE_CHECKING:
+        _underline: str = field(init=False, repr=False, compare=False)
+        _tag_text: str = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        # Tags repeat across posts; interned, they share one string
+        # object each, and dictionary lookups on them compare by identity.
+        # They're kept in a tuple, which is smaller than a list and,
+        # like the rest of a frozen Post, can't be changed.
+        object.__setattr__(self, "tags", tuple(sys.intern(t) for t in self.tags))
+        # Derived text for rendering, computed once. A frozen
+        # dataclass needs object.__setattr__() to set these.
+        object.__setattr__(self, "_underline", "-" * len(self.title))
+        object.__setattr__(self, "_tag_text", " ".join(self.tags))
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Persist only the fields; the derived text is rebuilt on load.
+        # Tags are saved as a plain list, which YAML writes as a simple sequence.
+        return dict(date=self.date, title=self.title, rst_text=self.rst_text, tags=list(self.tags))
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        for name, value in state.items():
+            object.__setattr__(self, name, value)
+        self.__post_init__()
 
     def as_dict(self) -> Dict[str, Any]:
+        """A new dictionary is built on each call, from the cached text.
+
+        It isn't kept on the Post: a Post would then hold a copy of its
+        content for as long as it lives, and a blog streamed one post at a
+        time would still end up with every dictionary in memory. A caller
+        that needs the dictionary more than once, like ``by_tag()``, keeps it.
+        """
         return dict(
             date=str(self.date),
             title=self.title,
-            underline="-" * len(self.title),
+            underline=self._underline,
             rst_text=self.rst_text,
-            tag_text=" ".join(self.tags),
+            tag_text=self._tag_text,
         )
 
 
@@ -51,8 +88,9 @@ class Blog_x(list):
     def by_tag(self) -> DefaultDict[str, List[Dict[str, Any]]]:
         tag_index: DefaultDict[str, List[Dict[str, Any]]] = defaultdict(list)
         for post in self:
+            post_dict = post.as_dict()
             for tag in post.tags:
-                tag_index[tag].append(post.as_dict())
+                tag_index[tag].append(post_dict)
         return tag_index
 
     def as_dict(self) -> Dict[str, Any]:
@@ -61,6 +99,9 @@ class Blog_x(list):
             entries=[p.as_dict() for p in self]
         )
 
+    def iter_entries(self) -> Iterator[Dict[str, Any]]:
+        return (p.as_dict() for p in self)
+
 
 # An example blog
 travel_x = Blog_x("Travel")
@@ -113,6 +154,23 @@ test_json_1 = """
     }
     """
 
+# For a large blog, the document can be written one post at a time,
+# so the list of all the entry dictionaries is never built.
+
+def blogx_iterencode(blog: Blog_x) -> Iterator[str]:
+    encoder = json.JSONEncoder()
+    yield f'{{"title": {encoder.encode(blog.title)}, "entries": ['
+    for n, entry in enumerate(blog.iter_entries()):
+        if n:
+            yield ", "
+        yield from encoder.iterencode(entry)
+    yield "]}"
+
+test_json_1_stream = """
+    >>> "".join(blogx_iterencode(travel_x)) == json.dumps(travel_x.as_dict())
+    True
+    """
+
 # Example 2. JSON: Flawed Container Design
 # ########################################
 
@@ -152,13 +210,36 @@ def blogx_encode(object: Any) -> Dict[str, Any]:
     else:
         return object
 
+# The decoder maps a ``__class__`` name to a class (or other callable)
+# with a dictionary lookup. Using eval() would compile each name, and
+# would also run any expression someone put in the document. A name
+# that isn't registered is an error.
+# More classes are added to this registry as they're defined.
+
+CLASS_REGISTRY: Dict[str, Callable[..., Any]] = {
+    "datetime.datetime": datetime.datetime,
+    "Post": Post,
+    "Blog_x": Blog_x,
+}
+
 def blogx_decode(some_dict: Dict[str, Any]) -> Dict[str, Any]:
-    if set(some_dict.keys()) == set(["__class__", "__args__", "__kw__"]):
-        class_ = eval(some_dict["__class__"])
+    if set(some_dict.keys()) == {"__class__", "__args__", "__kw__"}:
+        class_ = CLASS_REGISTRY.get(some_dict["__class__"])
+        if class_ is None:
+            raise ValueError(f"Unknown class {some_dict['__class__']!r}")
         return class_(*some_dict["__args__"], **some_dict["__kw__"])
     else:
         return some_dict
 
+test_json_2_decode = """
+    >>> json.loads('{"__class__": "x", "v": 1}', object_hook=blogx_decode)
+    {'__class__': 'x', 'v': 1}
+    >>> json.loads('{"__class__": "os.system", "__args__": ["ls"], "__kw__": {}}', object_hook=blogx_decode)
+    Traceback (most recent call last):
+    ...
+    ValueError: Unknown class 'os.system'
+"""
+
 test_json_2 = """
     >>> text = json.dumps(travel_x, indent=4, default=blogx_encode)
     >>> print(text)
@@ -219,8 +300,8 @@ test_json_2 = """
     >>> from pprint import pprint
     >>> copy = json.loads(text, object_hook=blogx_decode)
     >>> pprint(copy)
-    [Post(date=datetime.datetime(2013, 11, 14, 17, 25), title='Hard Aground', rst_text='Some embarrassing revelation. Including ☹ and ⚓', tags=['#RedRanger', '#Whitby42', '#ICW']),
-     Post(date=datetime.datetime(2013, 11, 18, 15, 30), title='Anchor Follies', rst_text='Some witty epigram. Including < & > characters.', tags=['#RedRanger', '#Whitby42', '#Mistakes'])]
+    [Post(date=datetime.datetime(2013, 11, 14, 17, 25), title='Hard Aground', rst_text='Some embarrassing revelation. Including ☹ and ⚓', tags=('#RedRanger', '#Whitby42', '#ICW')),
+     Post(date=datetime.datetime(2013, 11, 18, 15, 30), title='Anchor Follies', rst_text='Some witty epigram. Including < & > characters.', tags=('#RedRanger', '#Whitby42', '#Mistakes'))]
 
 """
 
@@ -238,22 +319,35 @@ from collections import defaultdict
 
 class Blog:
 
+    # Slots, like Post, instead of a per-instance __dict__.
+    __slots__ = ("title", "entries")
+
     def __init__(self, title: str, posts: Optional[List[Post]]=None) -> None:
         self.title = title
         self.entries = posts if posts is not None else []
 
+    # The title can change, so the underline is computed when it's used.
     @property
     def underline(self) -> str:
         return '='*len(self.title)
 
+    # Without a __dict__, the serializers need the state spelled out.
+    def __getstate__(self) -> Dict[str, Any]:
+        return dict(title=self.title, entries=self.entries)
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.title = state["title"]
+        self.entries = state["entries"]
+
     def append(self, post: Post) -> None:
         self.entries.append(post)
 
     def by_tag(self) -> Dict[str, List[Dict[str, Any]]]:
         tag_index: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
         for post in self.entries:
+            post_dict = post.as_dict()
             for tag in post.tags:
-                tag_index[tag].append(post.as_dict())
+                tag_index[tag].append(post_dict)
         return tag_index
 
     def as_dict(self) -> Dict[str, Any]:
@@ -284,42 +378,66 @@ travel.append(
 )
 
 
+# Each class has its own encoding function. The encoder finds the function
+# with a dictionary lookup on the type of the object, rather than trying a
+# sequence of isinstance() tests. A subclass is found through its __mro__.
+
+def datetime_encode(object: datetime.datetime) -> Dict[str, Any]:
+    return dict(
+        __class__="datetime.datetime",
+        __args__=[],
+        __kw__=dict(
+            year=object.year,
+            month=object.month,
+            day=object.day,
+            hour=object.hour,
+            minute=object.minute,
+            second=object.second,
+        ),
+    )
+
+
+def post_encode(object: Post) -> Dict[str, Any]:
+    return dict(
+        __class__="Post",
+        __args__=[],
+        __kw__=dict(
+            date=object.date,
+            title=object.title,
+            rst_text=object.rst_text,
+            tags=object.tags,
+        ),
+    )
+
+
+def blog_only_encode(object: Blog) -> Dict[str, Any]:
+    return dict(
+        __class__="Blog", __args__=[object.title, object.entries], __kw__={}
+    )
+
+
+BLOG_ENCODERS: Dict[type, Callable[[Any], Dict[str, Any]]] = {
+    datetime.datetime: datetime_encode,
+    Post: post_encode,
+    Blog: blog_only_encode,
+}
+
+
 def blog_encode(object: Any) -> Dict[str, Any]:
-    if isinstance(object, datetime.datetime):
-        return dict(
-            __class__="datetime.datetime",
-            __args__=[],
-            __kw__=dict(
-                year=object.year,
-                month=object.month,
-                day=object.day,
-                hour=object.hour,
-                minute=object.minute,
-                second=object.second,
-            ),
-        )
-    elif isinstance(object, Post):
-        return dict(
-            __class__="Post",
-            __args__=[],
-            __kw__=dict(
-                date=object.date,
-                title=object.title,
-                rst_text=object.rst_text,
-                tags=object.tags,
-            ),
-        )
-    elif isinstance(object, Blog):
-        return dict(
-            __class__="Blog", __args__=[object.title, object.entries], __kw__={}
-        )
-    else:
-        return object
+    for class_ in type(object).__mro__:
+        encoder = BLOG_ENCODERS.get(class_)
+        if encoder is not None:
+            return encoder(object)
+    raise TypeError(f"Object of type {type(object).__name__} is not JSON serializable")
+
 
+CLASS_REGISTRY["Blog"] = Blog
 
 def blog_decode(some_dict: Dict[str, Any]) -> Dict[str, Any]:
     if set(some_dict.keys()) == {"__class__", "__args__", "__kw__"}:
-        class_ = eval(some_dict["__class__"])
+        class_ = CLASS_REGISTRY.get(some_dict["__class__"])
+        if class_ is None:
+            raise ValueError(f"Unknown class {some_dict['__class__']!r}")
         return class_(*some_dict["__args__"], **some_dict["__kw__"])
     else:
         return some_dict
@@ -393,46 +511,64 @@ test_json_3 = """
     >>> print(copy.title)
     Travel
     >>> pprint(copy.entries)
-    [Post(date=datetime.datetime(2013, 11, 14, 17, 25), title='Hard Aground', rst_text='Some embarrassing revelation. Including ☹ and ⚓︎', tags=['#RedRanger', '#Whitby42', '#ICW']),
-     Post(date=datetime.datetime(2013, 11, 18, 15, 30), title='Anchor Follies', rst_text='Some witty epigram. Including < & > characters.', tags=['#RedRanger', '#Whitby42', '#Mistakes'])]
+    [Post(date=datetime.datetime(2013, 11, 14, 17, 25), title='Hard Aground', rst_text='Some embarrassing revelation. Including ☹ and ⚓︎', tags=('#RedRanger', '#Whitby42', '#ICW')),
+     Post(date=datetime.datetime(2013, 11, 18, 15, 30), title='Anchor Follies', rst_text='Some witty epigram. Including < & > characters.', tags=('#RedRanger', '#Whitby42', '#Mistakes'))]
+"""
+
+test_json_3_subclass = """
+    >>> class Stamp(datetime.datetime):
+    ...     pass
+    >>> json.dumps({"d": Stamp(2020, 1, 1)}, default=blog_encode)
+    '{"d": {"__class__": "datetime.datetime", "__args__": [], "__kw__": {"year": 2020, "month": 1, "day": 1, "hour": 0, "minute": 0, "second": 0}}}'
+    >>> json.dumps({1, 2}, default=blog_encode)
+    Traceback (most recent call last):
+    ...
+    TypeError: Object of type set is not JSON serializable
+"""
+
+test_as_dict_shared = """
+    >>> index = travel.by_tag()
+    >>> index["#RedRanger"][0] is index["#Whitby42"][0] is index["#ICW"][0]
+    True
+    >>> first = travel.entries[0]
+    >>> first.as_dict() is first.as_dict()
+    False
 """
 
 # Sidebar: Demo of rendering 1
 # ###############################
 
-# Here's a template for an individual post
-import string
+# Here's a template for an individual post.
+# str.format_map() is used rather than string.Template; the format
+# string's parse is simpler, and no Template object is built per call.
+post_template = """
+    {title}
+    {underline}
 
-# Here's a way to render the entire blog in RST
-def rst_render(blog: Blog) -> None:
-    post = string.Template(
-        """
-    $title
-    $underline
-
-    $rst_text
+    {rst_text}
 
-    :date: $date
+    :date: {date}
 
-    :tags: $tag_text
+    :tags: {tag_text}
     """
-    )
 
+# Here's a way to render the entire blog in RST.
+# The lines are collected in a list and written with a single call.
+def rst_render(blog: Blog) -> None:
     # with contextlib.redirect_stdout("some_file"):
-    print(f"{blog.title}\n{blog.underline}\n")
+    lines = [f"{blog.title}\n{blog.underline}\n"]
     for p in blog.entries:
-        print(post.substitute(**p.as_dict()))
+        lines.append(post_template.format_map(p.as_dict()))
 
     tag_index = blog.by_tag()
-    print("Tag Index")
-    print("=========")
-    print()
+    lines.extend(["Tag Index", "=========", ""])
     for tag in tag_index:
-        print(f"*   {tag}")
-        print()
+        lines.extend([f"*   {tag}", ""])
         for post_dict in tag_index[tag]:
-            print(f"    -   `{post_dict['title']}`_")
-        print()
+            lines.append(f"    -   `{post_dict['title']}`_")
+        lines.append("")
+    lines.append("")
+    sys.stdout.write("\n".join(lines))
 
 test_string_template_render = """
     >>> rst_render(travel)
@@ -486,9 +622,14 @@ test_string_template_render = """
 # Sidebar: Demo of rendering 2 (using Jinja2)
 # ############################################
 
-from jinja2 import Template
+from jinja2 import Environment, DictLoader
+
+# Loading the template through an Environment lets Jinja keep the
+# compiled template in memory. The template is in a DictLoader, not a
+# file, so there's nothing to gain from a bytecode cache on disk.
+# RST isn't HTML, so there's no autoescaping.
 
-blog_template = Template(
+blog_template_source = (
 """{{title}}
 {{underline}}
 
@@ -515,6 +656,12 @@ Tag Index
 """
 )
 
+jinja_env = Environment(
+    loader=DictLoader({"blog.rst": blog_template_source}),
+    autoescape=False,
+)
+blog_template = jinja_env.get_template("blog.rst")
+
 test_jinja_temple_render = """
     >>> print(blog_template.render(tags=travel.by_tag(), **travel.as_dict()))
     Travel
@@ -571,21 +718,28 @@ test_jinja_temple_render = """
 # Changes to the class definitions to add a ``_json`` method.
 
 
+# The encodings are cached, so dumping the same blog again reuses them.
+# A Post is frozen, so its encoding can't go stale; the Blog's encoding
+# refers to the live list of entries. Neither __getstate__ includes the cache.
+
 class Post_J(Post):
     """Not really essential to inherit from Post, it's simply a dataclass."""
     @property
     def _json(self) -> Dict[str, Any]:
-        return dict(
-            __class__=self.__class__.__name__,
-            __kw__=dict(
-                date=self.date, title=self.title, rst_text=self.rst_text, tags=self.tags
-            ),
-            __args__=[],
-        )
+        if "_json_cache" not in self.__dict__:
+            self.__dict__["_json_cache"] = dict(
+                __class__=self.__class__.__name__,
+                __kw__=dict(
+                    date=self.date, title=self.title, rst_text=self.rst_text, tags=self.tags
+                ),
+                __args__=[],
+            )
+        return self.__dict__["_json_cache"]
 
 class Blog_J(Blog):
     """Note. No explicit reference to Blog_J for entries."""
 
+    # Unlike a Post, a Blog can be retitled, so this isn't cached.
     @property
     def _json(self) -> Dict[str, Any]:
         return dict(
@@ -594,28 +748,38 @@ class Blog_J(Blog):
             __args__=[self.title, self.entries],
         )
 
+CLASS_REGISTRY.update(
+    {
+        "Post_J": Post_J,
+        "Blog_J": Blog_J,
+        "datetime.datetime.fromisoformat": datetime.datetime.fromisoformat,
+        "datetime.datetime.strptime": datetime.datetime.strptime,
+    }
+)
+
+# The default function is only called for objects json can't encode itself,
+# so there's no native-type case. The datetime test compares the type
+# directly, which is cheaper than isinstance().
+
 def blog_j_encode(object: Union[Blog_J, Post_J, Any]) -> Dict[str, Any]:
-    if isinstance(object, datetime.datetime):
-        return dict(
-            __class__="datetime.datetime",
-            __args__=[],
-            __kw__=dict(
-                year=object.year,
-                month=object.month,
-                day=object.day,
-                hour=object.hour,
-                minute=object.minute,
-                second=object.second,
-            ),
-        )
+    if type(object) is datetime.datetime:
+        return datetime_encode(object)
     else:
         try:
-            encoding = object._json
+            return object._json
         except AttributeError:
-            encoding = json.JSONEncoder().default(object)
-        return encoding
+            raise TypeError(
+                f"Object of type {type(object).__name__} is not JSON serializable"
+            ) from None
 
 
+test_json_4_unknown = """
+    >>> json.dumps({1, 2}, default=blog_j_encode)
+    Traceback (most recent call last):
+    ...
+    TypeError: Object of type set is not JSON serializable
+"""
+
 travel3 = Blog_J("Travel")
 travel3.append(
     Post_J(
@@ -702,25 +866,28 @@ test_json_4 = """
 # #############################################
 
 # Right at the edge of the envelope for dates. This may be too much flexibility.
-# There's an ISO standard for dates, and using it is simpler.
+# There's an ISO standard for dates, and using it is simpler. The date is
+# encoded as an ISO string, to be decoded by datetime.datetime.fromisoformat().
+# Unlike strftime() and strptime(), neither side interprets a format string.
 
 # For other unique data objects, however, this kind of pattern may be helpful
 # for providing a way to parse complex strings.
 
 # Changes to the class definitions
 def blog_j2_encode(object: Union[Blog_J, Post_J, Any]) -> Dict[str, Any]:
-    if isinstance(object, datetime.datetime):
+    if type(object) is datetime.datetime:
         return dict(
-            __class__="datetime.datetime.strptime",
-            __args__=[object.strftime("%Y-%m-%dT%H:%M:%S"), "%Y-%m-%dT%H:%M:%S"],
+            __class__="datetime.datetime.fromisoformat",
+            __args__=[object.isoformat(timespec="seconds")],
             __kw__={},
         )
     else:
         try:
-            encoding = object._json
+            return object._json
         except AttributeError:
-            encoding = json.JSONEncoder().default(object)
-        return encoding
+            raise TypeError(
+                f"Object of type {type(object).__name__} is not JSON serializable"
+            ) from None
 
 
 test_json_5 = """
@@ -736,10 +903,9 @@ test_json_5 = """
                     "__class__": "Post_J",
                     "__kw__": {
                         "date": {
-                            "__class__": "datetime.datetime.strptime",
+                            "__class__": "datetime.datetime.fromisoformat",
                             "__args__": [
-                                "2013-11-14T17:25:00",
-                                "%Y-%m-%dT%H:%M:%S"
+                                "2013-11-14T17:25:00"
                             ],
                             "__kw__": {}
                         },
@@ -757,10 +923,9 @@ test_json_5 = """
                     "__class__": "Post_J",
                     "__kw__": {
                         "date": {
-                            "__class__": "datetime.datetime.strptime",
+                            "__class__": "datetime.datetime.fromisoformat",
                             "__args__": [
-                                "2013-11-18T15:30:00",
-                                "%Y-%m-%dT%H:%M:%S"
+                                "2013-11-18T15:30:00"
                             ],
                             "__kw__": {}
                         },
@@ -783,12 +948,91 @@ test_json_5 = """
     >>> print(copy.title)
     Travel
     >>> pprint(copy.entries)
-    [Post_J(date=datetime.datetime(2013, 11, 14, 17, 25), title='Hard Aground', rst_text='Some embarrassing revelation. Including ☹ and ⚓', tags=['#RedRanger', '#Whitby42', '#ICW']),
-     Post_J(date=datetime.datetime(2013, 11, 18, 15, 30), title='Anchor Follies', rst_text='Some witty epigram.', tags=['#RedRanger', '#Whitby42', '#Mistakes'])]
+    [Post_J(date=datetime.datetime(2013, 11, 14, 17, 25), title='Hard Aground', rst_text='Some embarrassing revelation. Including ☹ and ⚓', tags=('#RedRanger', '#Whitby42', '#ICW')),
+     Post_J(date=datetime.datetime(2013, 11, 18, 15, 30), title='Anchor Follies', rst_text='Some witty epigram.', tags=('#RedRanger', '#Whitby42', '#Mistakes'))]
 """
 
-with (Path.cwd()/"data"/"ch10.json").open("w", encoding="UTF-8") as target:
-    json.dump(travel3, target, separators=(",", ":"), default=blog_j2_encode)
+# Each post's compact JSON text is cached, too. A blog is then written by
+# splicing the cached text of its posts into the outer document, so only
+# posts added since the last write are encoded again.
+# The entries of a Blog_J must be Post_J instances; unlike a plain Post,
+# they have a __dict__ to hold the cached text. Non-ASCII characters are
+# written as UTF-8, as orjson writes them, rather than as escapes.
+
+def post_j2_text(post: Union[Post_J, Any]) -> str:
+    try:
+        cache = post.__dict__
+    except AttributeError:
+        raise TypeError(
+            f"Object of type {type(post).__name__} is not JSON serializable"
+        ) from None
+    if "_json_text" not in cache:
+        cache["_json_text"] = json.dumps(
+            post, separators=(",", ":"), ensure_ascii=False, default=blog_j2_encode
+        )
+    return cache["_json_text"]
+
+
+# The outer document is Blog_J._json, encoded with a marker in place of
+# the entries list. The marker is then replaced with the spliced posts.
+
+ENTRIES_MARKER = "\0entries\0"
+
+
+def blog_j2_dumps(blog: Blog_J) -> str:
+    envelope = blog._json
+    args = [ENTRIES_MARKER if arg is blog.entries else arg for arg in envelope["__args__"]]
+    text = json.dumps(
+        dict(envelope, __args__=args),
+        separators=(",", ":"),
+        ensure_ascii=False,
+        default=blog_j2_encode,
+    )
+    entries = ",".join(post_j2_text(post) for post in blog.entries)
+    return text.replace(json.dumps(ENTRIES_MARKER), f"[{entries}]", 1)
+
+test_json_5_splice = """
+    >>> compact = json.dumps(
+    ...     travel3, separators=(",", ":"), ensure_ascii=False, default=blog_j2_encode
+    ... )
+    >>> blog_j2_dumps(travel3) == compact
+    True
+    >>> blog_j2_dumps(travel3) == compact
+    True
+    >>> plain = Blog_J("Plain", [travel.entries[0]])
+    >>> blog_j2_dumps(plain)
+    Traceback (most recent call last):
+    ...
+    TypeError: Object of type Post is not JSON serializable
+"""
+
+# The compact file doesn't need to be readable, only fast to write.
+# When the optional orjson package is available, it does the encoding.
+# Dataclasses and datetimes must be passed through to blog_j2_encode(),
+# otherwise orjson would encode them itself, producing a different document.
+# With them passed through, the bytes are the same as blog_j2_dumps() writes.
+
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore
+
+# Either way, the whole document is built in memory and written in one call.
+
+if orjson is not None:
+    document = orjson.dumps(
+        travel3,
+        default=blog_j2_encode,
+        option=orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_PASSTHROUGH_DATETIME,
+    )
+else:
+    document = blog_j2_dumps(travel3).encode("UTF-8")
+(Path.cwd()/"data"/"ch10.json").write_bytes(document)
+
+test_json_5_orjson = """
+    >>> orjson is None or document == blog_j2_dumps(travel3).encode("UTF-8")
+    True
+"""
 
 __test__ = {name: value for name, value in locals().items() if name.startswith("test_")}
 
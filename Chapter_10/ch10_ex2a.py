@@ -24,13 +24,23 @@ from Chapter_10.ch10_ex2 import Suit, Card, FaceCard, AceCard
 
 import yaml
 
+# The libyaml-based C classes are much faster than the pure Python
+# implementation. They're not available in every installation.
+# The !!python/object tags need the unsafe loader; use this only
+# with trusted documents.
+
+try:
+    from yaml import CDumper as Dumper, CUnsafeLoader as Loader
+except ImportError:
+    from yaml import Dumper, UnsafeLoader as Loader  # type: ignore
+
 # Example 1: That's it.
 # ######################
 
 # Start with original definitions
 
 test_yaml = """
-    >>> text = yaml.dump(travel)
+    >>> text = yaml.dump(travel, Dumper=Dumper)
     >>> print(text)
     !!python/object:Chapter_10.ch10_ex1.Blog
     entries:
@@ -53,15 +63,15 @@ test_yaml = """
     title: Travel
     <BLANKLINE>
     
-    >>> copy = yaml.load(text)
+    >>> copy = yaml.load(text, Loader=Loader)
     >>> print(type(copy), copy.title)
     <class 'Chapter_10.ch10_ex1.Blog'> Travel
     >>> for p in copy.entries:
     ...        print(p.date.year, p.date.month, p.date.day, p.title, p.tags)
-    2013 11 14 Hard Aground ['#RedRanger', '#Whitby42', '#ICW']
-    2013 11 18 Anchor Follies ['#RedRanger', '#Whitby42', '#Mistakes']
+    2013 11 14 Hard Aground ('#RedRanger', '#Whitby42', '#ICW')
+    2013 11 18 Anchor Follies ('#RedRanger', '#Whitby42', '#Mistakes')
 
-    >>> text2 = yaml.dump(travel, allow_unicode=True)
+    >>> text2 = yaml.dump(travel, Dumper=Dumper, allow_unicode=True)
     >>> print(text2)
     !!python/object:Chapter_10.ch10_ex1.Blog
     entries:
@@ -87,7 +97,7 @@ test_yaml = """
 """
 
 with (Path.cwd()/"data"/"ch10.yaml").open("w", encoding="UTF-8") as target:
-    yaml.dump(travel, target)
+    yaml.dump(travel, target, Dumper=Dumper)
 
 # Example 2: Cards
 # ###################
@@ -96,7 +106,7 @@ with (Path.cwd()/"data"/"ch10.yaml").open("w", encoding="UTF-8") as target:
 deck = [AceCard("A", Suit.Clubs), Card("2", Suit.Hearts), FaceCard("K", Suit.Diamonds)]
 
 test_yaml_dump = """
-    >>> text = yaml.dump(deck, allow_unicode=True)
+    >>> text = yaml.dump(deck, Dumper=Dumper, allow_unicode=True)
     >>> print(text)
     - !!python/object:Chapter_10.ch10_ex2.AceCard
       hard: 1
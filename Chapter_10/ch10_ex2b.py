@@ -24,64 +24,62 @@ deck = [AceCard("A", Suit.Clubs), Card("2", Suit.Hearts), FaceCard("K", Suit.Dia
 
 import yaml
 
+# Use the libyaml-based C classes when they're available.
 
-def card_representer(dumper: Any, card: Card) -> str:
-    return dumper.represent_scalar(
-        "!Card", f"{card.rank!s}{card.suit.value!s}")
+try:
+    from yaml import CSafeDumper as Dumper, CSafeLoader as Loader
+except ImportError:
+    from yaml import SafeDumper as Dumper, SafeLoader as Loader  # type: ignore
 
 
-def acecard_representer(dumper: Any, card: Card) -> str:
-    return dumper.represent_scalar(
-        "!AceCard", f"{card.rank!s}{card.suit.value!s}")
+# One representer and one constructor serve all three classes.
+# The YAML tag is found from the class, and the class from the tag.
 
+CARD_TAG = {Card: "!Card", AceCard: "!AceCard", FaceCard: "!FaceCard"}
+CARD_CLASS = {tag: cls for cls, tag in CARD_TAG.items()}
 
-def facecard_representer(dumper: Any, card: Card) -> str:
+
+def card_representer(dumper: Any, card: Card) -> str:
     return dumper.represent_scalar(
-        "!FaceCard", f"{card.rank!s}{card.suit.value!s}")
+        CARD_TAG[type(card)], f"{card.rank!s}{card.suit.value!s}")
 
 
-def card_constructor(loader: Any, node: Any) -> Card:
-    value = loader.construct_scalar(node)
-    rank, suit = value[:-1], value[-1]
-    return Card(rank, Suit(suit))
-
+# Suits are looked up by glyph in a plain dict, which avoids
+# the Enum call machinery for every card that's loaded.
 
-def acecard_constructor(loader: Any, node: Any) -> Card:
-    value = loader.construct_scalar(node)
-    rank, suit = value[:-1], value[-1]
-    return AceCard(rank, Suit(suit))
+_SUIT_BY_GLYPH = {s.value: s for s in Suit}
 
 
-def facecard_constructor(loader: Any, node: Any) -> Card:
+def card_constructor(loader: Any, node: Any) -> Card:
     value = loader.construct_scalar(node)
-    rank, suit = value[:-1], value[-1]
-    return FaceCard(rank, Suit(suit))
+    return CARD_CLASS[node.tag](value[:-1], _SUIT_BY_GLYPH[value[-1]])
 
 # Changes to the yaml module will apply throughout the application.
 # And this test run, also.
-# We can also add this
+# We can also add this. The functions are registered with the Dumper
+# and Loader classes chosen above; yaml.add_representer() without a
+# Dumper would only change the default, pure Python, Dumper.
 
-yaml.add_representer(Card, card_representer)
-yaml.add_representer(AceCard, acecard_representer)
-yaml.add_representer(FaceCard, facecard_representer)
-yaml.add_constructor("!Card", card_constructor)
-yaml.add_constructor("!AceCard", acecard_constructor)
-yaml.add_constructor("!FaceCard", facecard_constructor)
+for card_class, card_tag in CARD_TAG.items():
+    yaml.add_representer(card_class, card_representer, Dumper=Dumper)
+    yaml.add_constructor(card_tag, card_constructor, Loader=Loader)
 
 test_yaml_dump_load = """
     >>> print(*map(str, deck))
     A♣ 2♥ K♦
     
-    >>> text = yaml.dump(deck, allow_unicode=True)
-    >>> print(text)
-    - !AceCard 'A♣'
-    - !Card '2♥'
-    - !FaceCard 'K♦'
-    <BLANKLINE>
+    The libyaml and pure Python emitters quote the scalars differently,
+    so only the tags and the round trip are checked.
+
+    >>> text = yaml.dump(deck, Dumper=Dumper, allow_unicode=True)
+    >>> [line.split()[1] for line in text.splitlines()]
+    ['!AceCard', '!Card', '!FaceCard']
     
-    >>> copy = yaml.load(text, Loader=yaml.Loader)
+    >>> copy = yaml.load(text, Loader=Loader)
     >>> print(*map(str, copy))
     A♣ 2♥ K♦
+    >>> [type(card).__name__ for card in copy]
+    ['AceCard', 'Card', 'FaceCard']
 """
 
 
@@ -16,17 +16,25 @@ from typing import List, Optional, Dict, Any
 from dataclasses import dataclass
 from pathlib import Path
 from Chapter_10.ch10_ex2 import Suit, Card, AceCard, FaceCard
-from Chapter_10.ch10_ex2b import facecard_representer, acecard_representer, card_representer
 
 # YAML -- 2c cards with safe custom representations
 # ==================================================
 
 import yaml
 
+# The classes are registered with the libyaml-based safe loader
+# and dumper, when they're available.
+
+try:
+    from yaml import CSafeDumper as Dumper, CSafeLoader as Loader
+except ImportError:
+    from yaml import SafeDumper as Dumper, SafeLoader as Loader  # type: ignore
+
 
 class Card2(yaml.YAMLObject):
     yaml_tag = "!Card2"
-    yaml_loader = yaml.SafeLoader
+    yaml_loader = Loader
+    yaml_dumper = Dumper
 
     def __init__(self, rank, suit, hard=None, soft=None) -> None:
         self.rank = rank
@@ -55,31 +63,26 @@ class FaceCard2(Card2):
 deck2 = [AceCard2("A", "♣"), Card2("2", "♥"), FaceCard2("K", "♦")]
 
 test_yaml_dump_safe_load = """
-    # Changes to the yaml module will apply throughout the application.
-    >>> yaml.add_representer(Card, card_representer)
-    >>> yaml.add_representer(AceCard, acecard_representer)
-    >>> yaml.add_representer(FaceCard, facecard_representer)
-
-    >>> text2 = yaml.dump(deck2)
+    >>> text2 = yaml.dump(deck2, Dumper=Dumper, allow_unicode=True, default_flow_style=False)
     >>> print(text2)
     - !AceCard2
       hard: 1
       rank: A
       soft: 11
-      suit: "\\u2663"
+      suit: ♣
     - !Card2
       hard: 2
       rank: '2'
       soft: 2
-      suit: "\\u2665"
+      suit: ♥
     - !FaceCard2
       hard: 10
       rank: K
       soft: 10
-      suit: "\\u2666"
+      suit: ♦
     <BLANKLINE>
     
-    >>> copy = yaml.safe_load(text2)
+    >>> copy = yaml.load(text2, Loader=Loader)
     >>> print([str(c) for c in copy])
     ['A♣', '2♥', 'K♦']
 """
@@ -11,7 +11,7 @@ Chapter 10. Example 3. Pickle
 # ========================================
 
 import datetime
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple, Sequence
 from dataclasses import dataclass
 from pathlib import Path
 
@@ -24,13 +24,17 @@ from Chapter_10.ch10_ex2 import FaceCard, AceCard, Card, Suit
 # Example 1: Working
 # ####################
 
-# Use pickle to persist our microblog
+# Use pickle to persist our microblog.
+# pickletools.optimize() removes the memo PUT opcodes that are never used,
+# making the saved file smaller. It's still an ordinary pickle to load.
 import pickle
+import pickletools
 from pathlib import Path
 
 test_pickle = """
+    >>> data = pickletools.optimize(pickle.dumps(travel, protocol=pickle.HIGHEST_PROTOCOL))
     >>> with (Path.cwd()/"data"/"ch10_travel_blog.p").open("wb") as target:
-    ...     pickle.dump(travel, target)
+    ...     size = target.write(data)
 
     >>> with(Path.cwd()/"data"/"ch10_travel_blog.p").open("rb") as source:
     ...     copy = pickle.load(source)
@@ -39,8 +43,8 @@ test_pickle = """
     Travel
     >>> for post in copy.entries:
     ...     print(post)
-    Post(date=datetime.datetime(2013, 11, 14, 17, 25), title='Hard Aground', rst_text='Some embarrassing revelation. Including ☹ and ⚓︎', tags=['#RedRanger', '#Whitby42', '#ICW'])
-    Post(date=datetime.datetime(2013, 11, 18, 15, 30), title='Anchor Follies', rst_text='Some witty epigram. Including < & > characters.', tags=['#RedRanger', '#Whitby42', '#Mistakes'])
+    Post(date=datetime.datetime(2013, 11, 14, 17, 25), title='Hard Aground', rst_text='Some embarrassing revelation. Including ☹ and ⚓︎', tags=('#RedRanger', '#Whitby42', '#ICW'))
+    Post(date=datetime.datetime(2013, 11, 18, 15, 30), title='Anchor Follies', rst_text='Some witty epigram. Including < & > characters.', tags=('#RedRanger', '#Whitby42', '#Mistakes'))
 """
 
 # Example 2: Won't Init
@@ -75,7 +79,7 @@ test_audit = """
     >>> print(h)
     K♦ | A♣, 9♥
 
-    >>> b = pickle.dumps(h)
+    >>> b = pickle.dumps(h, protocol=pickle.HIGHEST_PROTOCOL)
 
     >>> logging.info("bad load from pickle")
     >>> h2 = pickle.loads(b)
@@ -88,28 +92,49 @@ test_audit = """
 
 class Hand2:
 
+    # With slots, there's no instance __dict__, and the pickled state
+    # is a tuple of two values rather than a dict of attribute names.
+    # The string is cached until the next append(); it's not pickled.
+    # So the cache can't go stale, the dealer card and the cards are
+    # read-only: the cards are a tuple, changed only by append().
+    __slots__ = ("_dealer_card", "_cards", "_str")
+
     def __init__(self, dealer_card: Card, *cards: Card) -> None:
-        self.dealer_card = dealer_card
-        self.cards = list(cards)
-        for c in self.cards:
+        self._dealer_card = dealer_card
+        self._cards: Tuple[Card, ...] = cards
+        self._str: Optional[str] = None
+        for c in self._cards:
             audit_log.info("Initial %s", c)
 
+    @property
+    def dealer_card(self) -> Card:
+        return self._dealer_card
+
+    @property
+    def cards(self) -> Tuple[Card, ...]:
+        return self._cards
+
     def append(self, card: Card) -> None:
-        self.cards.append(card)
+        self._cards += (card,)
+        self._str = None
         audit_log.info("Hit %s", card)
 
     def __str__(self) -> str:
-        cards = ", ".join(map(str, self.cards))
-        return f"{self.dealer_card} | {cards}"
-
-    def __getstate__(self) -> Dict[str, Any]:
-        return vars(self)
-
-    def __setstate__(self, state: Dict[str, Any]) -> None:
-        # Not very secure -- hard for mypy to detect what's going on.
-        self.__dict__.update(state)
-        for c in self.cards:
-            audit_log.info("Initial (unpickle) %s", c)
+        if self._str is None:
+            cards = ", ".join(map(str, self._cards))
+            self._str = f"{self._dealer_card} | {cards}"
+        return self._str
+
+    def __getstate__(self) -> Tuple[Card, Tuple[Card, ...]]:
+        return self._dealer_card, self._cards
+
+    def __setstate__(self, state: Tuple[Card, Sequence[Card]]) -> None:
+        dealer_card, cards = state
+        self._dealer_card = dealer_card
+        self._cards = tuple(cards)
+        self._str = None
+        # One audit record for the whole hand, rather than one per card.
+        audit_log.info("Initial (unpickle) %s", ", ".join(map(str, self._cards)))
 
 test_audit_2 = """
     >>> logging.basicConfig(stream=sys.stderr, level=logging.INFO)
@@ -117,12 +142,19 @@ test_audit_2 = """
     >>> logging.info("good create")
     >>> hp = Hand2(FaceCard("K", Suit.Diamonds), AceCard("A", Suit.Clubs), Card("9", Suit.Hearts))
 
-    >>> data = pickle.dumps(hp)
+    >>> data = pickle.dumps(hp, protocol=pickle.HIGHEST_PROTOCOL)
 
     >>> logging.info("good load from pickle")
     >>> h2p = pickle.loads(data)
     >>> print(h2p)
     K♦ | A♣, 9♥
+    >>> h2p.append(Card("2", Suit.Spades))
+    >>> print(h2p)
+    K♦ | A♣, 9♥, 2♠
+    >>> h2p.cards = []  # doctest: +IGNORE_EXCEPTION_DETAIL
+    Traceback (most recent call last):
+    ...
+    AttributeError: can't set attribute
 
     >>> logging.shutdown()
 """
@@ -132,22 +164,40 @@ test_audit_2 = """
 
 import builtins
 
+# The permitted globals are listed once, in a dictionary keyed by
+# (module, name). find_class() is then a single lookup.
+
+SAFE_BUILTINS = (
+    "bool", "bytearray", "bytes", "complex", "dict", "float",
+    "frozenset", "int", "list", "range", "set", "slice", "str", "tuple",
+)
+
+ALLOWED_GLOBALS: Dict[Tuple[str, str], Any] = {
+    ("builtins", name): getattr(builtins, name) for name in SAFE_BUILTINS
+}
+# Valid module names depends on execution context.
+ALLOWED_GLOBALS.update(
+    {
+        (module, cls.__name__): cls
+        for module in ("__main__", "Chapter_10.ch10_ex3", "ch10_ex3")
+        for cls in (Hand_bad, Hand2)
+    }
+)
+# Classes from any of our application modules...
+ALLOWED_GLOBALS.update(
+    {("Chapter_10.ch10_ex2", cls.__name__): cls for cls in (Suit, Card, AceCard, FaceCard)}
+)
+
 
 class RestrictedUnpickler(pickle.Unpickler):
 
     def find_class(self, module: str, name: str) -> Any:
-        if module == "builtins":
-            if name not in ("exec", "eval"):
-                return getattr(builtins, name)
-        elif module in ("__main__", "Chapter_10.ch10_ex3", "ch10_ex3"):
-            # Valid module names depends on execution context.
-            return globals()[name]
-        # elif module in any of our application modules...
-        elif module in ("Chapter_10.ch10_ex2",):
-            return globals()[name]
-        raise pickle.UnpicklingError(
-            f"global '{module}.{name}' is forbidden"
-        )
+        try:
+            return ALLOWED_GLOBALS[module, name]
+        except KeyError:
+            raise pickle.UnpicklingError(
+                f"global '{module}.{name}' is forbidden"
+            ) from None
 
 
 test_audit_3 = """
@@ -156,7 +206,7 @@ test_audit_3 = """
 
     >>> hp = Hand2(FaceCard("K", Suit.Diamonds), AceCard("A", Suit.Clubs), Card("9", Suit.Hearts))
 
-    >>> data = pickle.dumps(hp)
+    >>> data = pickle.dumps(hp, protocol=pickle.HIGHEST_PROTOCOL)
     >>> try:
     ...     h2s = RestrictedUnpickler(io.BytesIO(data)).load()
     ... except pickle.UnpicklingError as e:
@@ -166,12 +216,18 @@ test_audit_3 = """
     
     Creating an unimportable pickle file requires something not in Chapter_10.ch10_ex2.
     >>> from Chapter_10.ch10_ex1 import travel
-    >>> bad_data = pickle.dumps(travel)
+    >>> bad_data = pickle.dumps(travel, protocol=pickle.HIGHEST_PROTOCOL)
     >>> try:
     ...     travel_copy = RestrictedUnpickler(io.BytesIO(bad_data)).load()
     ... except pickle.UnpicklingError as e:
     ...     print(e)
     global 'Chapter_10.ch10_ex1.Blog' is forbidden
+
+    Only the listed builtins are available.
+    >>> RestrictedUnpickler(io.BytesIO(b"cbuiltins\\ngetattr\\n.")).load()
+    Traceback (most recent call last):
+    ...
+    _pickle.UnpicklingError: global 'builtins.getattr' is forbidden
 """
 
 __test__ = {name: value for name, value in locals().items() if name.startswith("test_")}
@@ -12,7 +12,7 @@ Chapter 10. Example 4. CSV
 
 # A detail class for micro-blog posts
 import datetime
-from typing import List, Optional, Dict, Any, Iterator
+from typing import List, Optional, Dict, Any, Iterator, TextIO
 from dataclasses import dataclass
 from pathlib import Path
 
@@ -65,6 +65,9 @@ class Flat_Bet(Betting):
 
 class Martingale_Bet(Betting):
 
+    # The largest stage; the bet doubles after each loss, up to this.
+    max_stage = 512
+
     def __init__(self, *args) -> None:
         super().__init__(*args)
         self.stage = 1
@@ -82,7 +85,7 @@ class Martingale_Bet(Betting):
         super().win(amount)
 
     def loss(self, amount) -> None:
-        self.stage = min(self.stage * 2, 512)
+        self.stage = min(self.stage * 2, self.max_stage)
         super().loss(amount)
 
     def push(self) -> None:
@@ -103,6 +106,11 @@ class Broke(Exception):
 # A "Table" implementation for Blackjack.
 class Blackjack(Table):
 
+    # The table's bet limit, and the cumulative odds of a loss, a win,
+    # and a push; above the last is a win paid double.
+    table_limit = 50
+    outcome_odds = (0.579, 0.883, 0.943)
+
     def __init__(self, play: Player_Strategy, betting: Betting) -> None:
         self.player = play
         self.betting = betting
@@ -114,8 +122,8 @@ class Blackjack(Table):
         return self.betting.stake
 
     def bet(self, game_state: str, amount: float) -> None:
-        if amount > 50:
-            raise BadBet(50)
+        if amount > self.table_limit:
+            raise BadBet(self.table_limit)
         self.bets[game_state] = amount
 
     def play_1(self) -> None:
@@ -124,14 +132,15 @@ class Blackjack(Table):
         self.betting.bet(self, "ante")
         bet = sum(self.bets.values())
         outcome = random.random()
-        if outcome < 0.579:
+        loss, win, push = self.outcome_odds
+        if outcome < loss:
             self.betting.loss(bet)
-        elif 0.579 <= outcome < 0.883:
+        elif loss <= outcome < win:
             self.betting.win(bet)
-        elif 0.883 <= outcome < 0.943:
+        elif win <= outcome < push:
             self.betting.push()
         else:
-            # 0.943 <= outcome
+            # push <= outcome
             self.betting.win(bet * 2)
 
     def until_broke_or_rounds(self, limit: int) -> None:
@@ -167,20 +176,161 @@ def gamestat_iter(
         yield GameStat(player.__name__, betting.__name__, b.rounds, b.betting.stake)
 
 
+# The Martingale games can also be played from a block of draws, without
+# building Blackjack and Betting objects. martingale_game() replays one game
+# with the rules and limits Blackjack and Martingale_Bet use.
+
+from typing import Iterable, Tuple
+
+
+def martingale_game(draws: Iterable[float], stake: float) -> Tuple[int, float]:
+    """Play one Martingale game, one round per draw, until broke.
+
+    Returns the number of rounds played and the final stake.
+    """
+    loss, win, push = Blackjack.outcome_odds
+    stage = 1
+    rounds = 0
+    for outcome in draws:
+        if stake <= 0:
+            break
+        bet = min(stage, stake, Blackjack.table_limit)
+        if outcome < loss:
+            stake -= bet
+            stage = min(stage * 2, Martingale_Bet.max_stage)
+        elif outcome < win:
+            stake += bet
+            stage = 1
+        elif outcome < push:
+            pass
+        else:
+            stake += bet * 2
+            stage = 1
+        rounds += 1
+    return rounds, stake
+
+
+test_martingale_game = """
+    >>> stats = []
+    >>> for sample in range(30):
+    ...     random.seed(sample)
+    ...     draws = (random.random() for _ in range(100))
+    ...     stats.append(GameStat("Player_Strategy", "Martingale_Bet", *martingale_game(draws, 100)))
+    >>> stats == list(gamestat_iter(Player_Strategy, Martingale_Bet))
+    True
+"""
+
+# With numpy, all of the games are played at once from one array of draws.
+# Outcome codes are 0 lose, 1 win, 2 push, 3 win double. The stage before
+# each round is 2**(losses since the last win), so cumulative sums give
+# every bet, and a cumulative sum of the payouts gives every stake. This
+# holds until a stake can't cover the full bet. A loss in that round ends
+# the game; otherwise the round is settled with the smaller bet, and the
+# game's remaining rounds go around the loop again.
+
+try:
+    import numpy as np
+except ImportError:
+    np = None  # type: ignore
+
+
+def martingale_stats(limit: int = 100, samples: int = 30, seed: int = 0) -> List[GameStat]:
+    """Play ``samples`` Martingale games of up to ``limit`` rounds.
+
+    The draws come from ``np.random.default_rng(seed)``, or from
+    ``random.Random(seed)`` when numpy isn't installed. These are
+    different random streams from each other and from gamestat_iter(),
+    so the individual games differ while their distribution doesn't.
+    """
+    stake = Martingale_Bet().stake
+    if np is None:
+        rng = random.Random(seed)
+        games = [
+            martingale_game([rng.random() for _ in range(limit)], stake)
+            for sample in range(samples)
+        ]
+    else:
+        draws = np.random.default_rng(seed).random((samples, limit))
+        outcomes = np.searchsorted(Blackjack.outcome_odds, draws, side="right")
+        payouts = np.array([-1, 1, 0, 2])
+        max_stage = Martingale_Bet.max_stage
+        results = np.tile([0, stake], (samples, 1))
+        # The games still being played, where each resumes, with what
+        # stake, and with how many losses since its last win.
+        rows = np.arange(samples)
+        start = np.zeros(samples, dtype=int)
+        stakes = np.full(samples, stake)
+        streak0 = np.zeros(samples, dtype=int)
+        # Most games go broke long before the limit, so each pass looks
+        # a few dozen rounds ahead rather than all the way to the limit.
+        window = 64
+        while rows.size and limit:
+            cols = start[:, None] + np.arange(min(window, limit - start.min()))
+            valid = cols < limit
+            played = np.where(valid, outcomes[rows[:, None], np.minimum(cols, limit - 1)], 2)
+            lost = played == 0
+            won = (played == 1) | (played == 3)
+            losses = np.cumsum(lost, axis=1)
+            at_win = np.maximum.accumulate(np.where(won, losses, -streak0[:, None]), axis=1)
+            streak = losses - lost
+            streak[:, 0] += streak0
+            streak[:, 1:] -= at_win[:, :-1]
+            stage = np.minimum(2 ** np.minimum(streak, max_stage.bit_length()), max_stage)
+            bet = np.minimum(stage, Blackjack.table_limit)
+            payout = payouts[played] * bet
+            after = stakes[:, None] + np.cumsum(payout, axis=1)
+            before = after - payout
+            short = ((after <= 0) | (before < bet)) & valid
+            ended = short.any(axis=1)
+            r = np.where(ended, short.argmax(axis=1), np.minimum(cols.shape[1], limit - start) - 1)
+            at = np.arange(rows.size), r
+            # Settle the short round with the whole stake as the bet.
+            stakes = np.where(ended, before[at] * (1 + payouts[played[at]]), after[at])
+            start = start + r + 1
+            done = (stakes <= 0) | (start >= limit)
+            results[rows[done]] = np.stack([start, stakes], axis=1)[done]
+            streak0 = np.where(won[at], 0, streak[at] + lost[at])
+            rows, start, stakes, streak0 = rows[~done], start[~done], stakes[~done], streak0[~done]
+        games = results.tolist()
+    return [
+        GameStat(Player_Strategy.__name__, Martingale_Bet.__name__, int(n), int(final))
+        for n, final in games
+    ]
+
+
+test_martingale_stats = """
+    >>> if np is not None:
+    ...     draws = np.random.default_rng(0).random((200, 1000))
+    ...     expected = [martingale_game(row, 100) for row in draws]
+    ... else:
+    ...     rng = random.Random(0)
+    ...     expected = [martingale_game([rng.random() for _ in range(1000)], 100) for _ in range(200)]
+    >>> stats = martingale_stats(limit=1000, samples=200)
+    >>> [(gs.rounds, gs.final) for gs in stats] == expected
+    True
+"""
+
 import csv
 from pathlib import Path
 
+# A GameStat is a tuple with its fields in the header's order, so it can
+# be written directly. There's no need for a DictWriter and a dict per row.
+
 with (Path.cwd() / "data" / "ch10_blackjack_1.csv").open("w", newline="") as target:
-    writer = csv.DictWriter(target, GameStat._fields)
-    writer.writeheader()
-    for gamestat in gamestat_iter(Player_Strategy, Martingale_Bet):
-        writer.writerow(gamestat._asdict())
+    writer = csv.writer(target)
+    writer.writerow(GameStat._fields)
+    writer.writerows(gamestat_iter(Player_Strategy, Martingale_Bet))
+
+# The CSV text can also be built in memory, then written to the file
+# in one call. This matters when there are very many rows.
 
 data = gamestat_iter(Player_Strategy, Martingale_Bet)
+buffer = io.StringIO()
+writer = csv.writer(buffer)
+writer.writerow(GameStat._fields)
+writer.writerows(data)
 with (Path.cwd() / "data" / "ch10_blackjack_2.csv").open("w", newline="") as target:
-    writer = csv.DictWriter(target, GameStat._fields)
-    writer.writeheader()
-    writer.writerows(g._asdict() for g in data)
+    target.write(buffer.getvalue())
 
 # Example 2 loading
 # ###################
@@ -201,6 +351,17 @@ def gamestat_rdr_iter(
         yield GameStat(row["player"], row["bet"], int(row["rounds"]), int(row["final"]))
 
 
+# When the columns are in GameStat order, a plain csv.reader is enough.
+# Unpacking each row avoids building a dictionary for every line.
+
+def gamestat_row_iter(source: TextIO) -> Iterator[GameStat]:
+    rdr = csv.reader(source)
+    header = next(rdr)
+    assert header == list(GameStat._fields)
+    for player, bet, rounds, final in rdr:
+        yield GameStat(player, bet, int(rounds), int(final))
+
+
 test_write_read_1 = """
     >>> with (Path.cwd()/"data"/"ch10_blackjack_1.csv").open() as source:
     ...     reader = csv.DictReader(source)
@@ -237,6 +398,13 @@ test_write_read_1 = """
     GameStat(player='Player_Strategy', bet='Martingale_Bet', rounds=68, final=0)
     GameStat(player='Player_Strategy', bet='Martingale_Bet', rounds=39, final=0)
     GameStat(player='Player_Strategy', bet='Martingale_Bet', rounds=47, final=0)
+
+    >>> with (Path.cwd()/"data"/"ch10_blackjack_1.csv").open() as source:
+    ...     by_position = list(gamestat_row_iter(source))
+    >>> with (Path.cwd()/"data"/"ch10_blackjack_1.csv").open() as source:
+    ...     by_name = list(gamestat_rdr_iter(csv.DictReader(source)))
+    >>> by_position == by_name
+    True
 """
 
 # Example 3 blog and post one file
@@ -252,8 +420,9 @@ with (Path.cwd() / "data" / "ch10_blog3.csv").open("w", newline="") as target:
     wtr.writerow(["__class__", "title", "date", "title", "rst_text", "tags"])
     for b in blogs:
         wtr.writerow(["Blog", b.title, None, None, None, None])
-        for p in b.entries:
-            wtr.writerow(["Post", None, p.date, p.title, p.rst_text, p.tags])
+        wtr.writerows(
+            ["Post", None, p.date, p.title, p.rst_text, p.tags] for p in b.entries
+        )
 
 # Super-important: column order must match __init__() param order.
 # Hard to do in general.
@@ -277,7 +446,33 @@ with (Path.cwd() / "data" / "ch10_blog3.csv").open() as source:
 
 # Can use the following for safe eval of literals.
 import ast
+import re
+
+# The tags are always a sequence of simple strings. A regular expression
+# finds them without compiling the text as Python. If the text isn't
+# exactly the repr() of what was found, ast.literal_eval() handles it.
+
+TAG_PAT = re.compile(r"'([^'\\]*)'")
+
+
+def parse_tags(text: str) -> List[str]:
+    tags = TAG_PAT.findall(text)
+    if text in (repr(tuple(tags)), repr(tags)):
+        return tags
+    return list(ast.literal_eval(text))
+
+
+test_parse_tags = """
+    >>> parse_tags("('#RedRanger', '#Whitby42', '#ICW')")
+    ['#RedRanger', '#Whitby42', '#ICW']
+    >>> parse_tags('["#Mistakes", "#ICW"]')
+    ['#Mistakes', '#ICW']
+"""
+
 
+# The dates were written with str(), which is ISO format with a space
+# separator. fromisoformat() parses that directly, without the
+# format-string machinery of strptime().
 
 def blog_builder(row: List[str]) -> Blog:
     return Blog(row[1])
@@ -285,10 +480,10 @@ def blog_builder(row: List[str]) -> Blog:
 
 def post_builder(row: List[str]) -> Post:
     return Post(
-        date=datetime.datetime.strptime(row[2], "%Y-%m-%d %H:%M:%S"),
+        date=datetime.datetime.fromisoformat(row[2]),
         title=row[3],
         rst_text=row[4],
-        tags=ast.literal_eval(row[5]),
+        tags=parse_tags(row[5]),
     )
 
 
@@ -353,8 +548,7 @@ with (Path.cwd() / "data" / "ch10_blog5.csv").open("w", newline="") as target:
         ["Blog.title", "Post.date", "Post.title", "Post.tags", "Post.rst_text"]
     )
     for b in blogs:
-        for p in b.entries:
-            wtr.writerow([b.title, p.date, p.title, p.tags, p.rst_text])
+        wtr.writerows([b.title, p.date, p.title, p.tags, p.rst_text] for p in b.entries)
 
 from typing import Union, Iterator, Tuple
 
@@ -364,10 +558,10 @@ import ast
 
 def post_builder5(row: Dict[str, str]) -> Post:
     return Post(
-        date=datetime.datetime.strptime(row["Post.date"], "%Y-%m-%d %H:%M:%S"),
+        date=datetime.datetime.fromisoformat(row["Post.date"]),
         title=row["Post.title"],
         rst_text=row["Post.rst_text"],
-        tags=ast.literal_eval(row["Post.tags"]),
+        tags=parse_tags(row["Post.tags"]),
     )
 
 
@@ -376,6 +570,8 @@ def blog_builder5(row: Dict[str, str]) -> Blog:
 
 
 from typing import TextIO
+from itertools import groupby
+from operator import itemgetter
 
 
 def blog_iter2(source: TextIO) -> Iterator[Blog]:
@@ -386,22 +582,10 @@ def blog_iter2(source: TextIO) -> Iterator[Blog]:
         set(rdr.fieldnames)
         == {"Blog.title", "Post.date", "Post.title", "Post.tags", "Post.rst_text"}
     )
-    # Fetch the first row and build the first Blog and Post from this
-    row = next(rdr)
-    blog = blog_builder5(row)
-    post = post_builder5(row)
-    blog.append(post)
-
-    # Fetch all subsequent rows.
-    # Emit completed Blogs.
-    # Append Posts to the currently open Blog
-    for row in rdr:
-        if row["Blog.title"] != blog.title:
-            yield blog
-            blog = blog_builder5(row)
-        post = post_builder5(row)
-        blog.append(post)
-    yield blog
+    # Each run of rows with the same Blog.title is one Blog.
+    # Its Posts are built as a batch and handed to the Blog all at once.
+    for title, rows in groupby(rdr, key=itemgetter("Blog.title")):
+        yield Blog(title, [post_builder5(row) for row in rows])
 
 
 test_blog_iter_2 = """
@@ -13,7 +13,7 @@ Chapter 10. Example 5. EBCDIC encode/decode
 # A detail class for micro-blog posts
 import datetime
 from typing import List, Optional, Dict, Any, Tuple, Callable, Union
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
 
 from Chapter_10.ch10_ex1 import Post, Blog, travel, rst_render
@@ -32,8 +32,9 @@ import io
 # Metadata for Gamestat objects.
 # attribute name, start, size, and an output format specification.
 
-from typing import NamedTuple, BinaryIO, TextIO, Iterable, Iterator, cast
+from typing import NamedTuple, BinaryIO, TextIO, IO, AnyStr, Iterable, Iterator, cast
 from pathlib import Path
+from operator import attrgetter
 
 class FixedField(NamedTuple):
     name: str
@@ -55,41 +56,64 @@ metadata_txt = Metadata(
     reclen=53,
 )
 
+# An attrgetter of one name returns the bare value, not a 1-tuple.
+def attr_tuple_getter(names: List[str]) -> Callable[[Any], Tuple[Any, ...]]:
+    getter = attrgetter(*names)
+    if len(names) == 1:
+        return lambda item: (getter(item),)
+    return getter
+
+
 # A function to transform a namedtuple into a fixed-layout record.
-def gamestat_record(gamestat:GameStat, metadata: Metadata) -> str:
-    record_fields = [
-        format_spec.format(getattr(gamestat, name), size=size)
-        for name, start, size, format_spec in metadata.fields
+# When many records share one layout, the work of taking the layout apart
+# can be done once. The returned function fetches all the attributes with
+# one attrgetter call and has each field's bound format method ready.
+def gamestat_record_formatter(metadata: Metadata) -> Callable[[GameStat], str]:
+    values = attr_tuple_getter([name for name, start, size, format_spec in metadata.fields])
+    formats = [
+        (format_spec.format, size) for name, start, size, format_spec in metadata.fields
     ]
-    record_text = "".join(record_fields)
-    assert len(record_text) == metadata.reclen, f"Got {len(record_text)} Should Be {metadata.reclen}"
-    return record_text
+
+    def record(gamestat: GameStat) -> str:
+        record_text = "".join(
+            [format_value(value, size=size) for (format_value, size), value in zip(formats, values(gamestat))]
+        )
+        assert len(record_text) == metadata.reclen, f"Got {len(record_text)} Should Be {metadata.reclen}"
+        return record_text
+
+    return record
+
+
+# A single record.
+def gamestat_record(gamestat: GameStat, metadata: Metadata) -> str:
+    return gamestat_record_formatter(metadata)(gamestat)
 
 
 # An application of the game statistics definitions.
+to_record = gamestat_record_formatter(metadata_txt)
 with (Path.cwd()/"data"/"ch10_blackjack.file").open("w", encoding="cp037", newline="") as target:
-    for gamestat in gamestat_iter(Player_Strategy, Martingale_Bet):
-        record = gamestat_record(gamestat, metadata_txt)
-        target.write(record)
+    target.writelines(map(to_record, gamestat_iter(Player_Strategy, Martingale_Bet)))
 
 # Example 2 loading all text
 # ##########################
 
 # Loading data from the simulator. Part 1 -- Physical decomposition into rows.
-def line_iter(aFile: TextIO, metadata: Union[Metadata, 'XMetadata']) -> Iterator[str]:
-    recBytes = aFile.read(metadata.reclen)
-    while recBytes:
-        yield recBytes
-        recBytes = aFile.read(metadata.reclen)
+# The file is read with a single read(); the records are slices of it.
+def line_iter(aFile: IO[AnyStr], metadata: Union[Metadata, 'XMetadata']) -> Iterator[AnyStr]:
+    content = aFile.read()
+    reclen = metadata.reclen
+    for start in range(0, len(content), reclen):
+        yield content[start:start + reclen]
 
 
 # Part 2 -- decomposition into named fields.
+# The slices are built once for the file, not once per record.
 def record_iter(aFile: TextIO, metadata: Metadata) -> Iterator[Dict[str, str]]:
+    fields = [
+        (name, slice(start, start + size)) for name, start, size, format_spec in metadata.fields
+    ]
     for line in line_iter(aFile, metadata):
-        record = {
-            name: line[start:start + size].strip()
-            for name, start, size, format_spec in metadata.fields
-        }
+        record = {name: line[where].strip() for name, where in fields}
         yield record
 
 
@@ -206,6 +230,12 @@ def display_decode(data: bytes, metadata: 'XMetadata', field_metadata: 'XField')
 
 # Numeric USAGE COMP-3 conversion.
 # The COBOL program encoded the number into packed decimal representation.
+# Each byte holds two digits, one per nibble, so the hex text of the bytes
+# is the digits, followed by the sign nibble. bytes.hex() does that
+# conversion in C. The sign nibble is looked up in a table:
+# 0xB and 0xD are negative, all others positive.
+COMP3_SIGN = tuple("-" if n in (0x0b, 0x0d) else "+" for n in range(16))
+
 def comp3_decode(data: bytes, metadata: 'XMetadata', field_metadata: 'XField') -> Decimal:
     """Decode USAGE COMP-3 data.
     metadata has encoding, which is not used.
@@ -225,15 +255,8 @@ def comp3_decode(data: bytes, metadata: 'XMetadata', field_metadata: 'XField') -
 
     """
     precision = field_metadata.precision or 0  # Default when precision is omitted
-    digits = []
-    for b in data[:-1]:
-        hi, lo = divmod(b, 16)
-        digits.append(str(hi))
-        digits.append(str(lo))
-    digit, sign_byte = divmod(data[-1], 16)
-    digits.append(str(digit))
-    text = "".join(digits)
-    sign = "-" if sign_byte in (0x0b, 0x0d) else "+"
+    text = data.hex()[:-1]
+    sign = COMP3_SIGN[data[-1] & 0x0F]
     return Decimal(sign + text[:-precision] + "." + text[-precision:])
 
 
@@ -261,6 +284,16 @@ def alpha_encode(data: Any, metadata: 'XMetadata', field_metadata: 'XField') ->
     return bytes
 
 
+# The scale is an int: a Decimal times an int is exact, and an int
+# value (as in GameStat) stays an int, with no Decimal arithmetic.
+# A float would be silently truncated, so it's rejected, as the
+# Decimal scale factor used to do.
+def scaled_digits(data: Union[int, Decimal], precision: int) -> int:
+    if not isinstance(data, (int, Decimal)):
+        raise TypeError(f"Can't encode {type(data).__name__} {data!r} exactly; use int or Decimal")
+    return abs(int(data * 10 ** precision))
+
+
 # Encoder for numeric USAGE DISPLAY, trailing sign.
 def display_encode(data: Decimal, metadata: 'XMetadata', field_metadata: 'XField') -> bytes:
     """Encode numeric USAGE DISPLAY trailing sign.
@@ -279,10 +312,15 @@ def display_encode(data: Decimal, metadata: 'XMetadata', field_metadata: 'XField
     >>> actual ==  bytes([0xf9, 0xf8, 0xf7, 0xf6, 0xf5, 0x60])
     True
 
+    >>> display_encode(0.29, meta, field_meta)
+    Traceback (most recent call last):
+    ...
+    TypeError: Can't encode float 0.29 exactly; use int or Decimal
+
     """
     precision = field_metadata.precision or 0
     text = "{0:0>{size}d}{1}".format(
-        abs(int(data * Decimal(10) ** precision)),
+        scaled_digits(data, precision),
         "-" if data < 0 else "+",
         size=field_metadata.length - 1,
     )
@@ -313,14 +351,17 @@ def comp3_encode(data: Decimal, metadata: 'XMetadata', field_metadata: 'XField')
 
     """
     precision = field_metadata.precision or 0
-    value = abs(int(data * Decimal(10) ** precision))
-    digits = [0x0d if data < 0 else 0x00]  # Trailing sign.
-    nDigits = field_metadata.length * 2 - 1
-    for i in range(nDigits):
-        digits = [value % 10] + digits
-        value //= 10
-    b = bytes((hi * 16 + lo for hi, lo in list(zip(digits[::2], digits[1::2]))))
-    return b
+    value = scaled_digits(data, precision)
+    # Fill the bytes from the right: the last byte has a digit and the
+    # trailing sign, every other byte has two digits.
+    packed = bytearray(field_metadata.length)
+    value, digit = divmod(value, 10)
+    packed[-1] = digit << 4 | (0x0d if data < 0 else 0x00)
+    for i in range(field_metadata.length - 2, -1, -1):
+        value, lo = divmod(value, 10)
+        value, hi = divmod(value, 10)
+        packed[i] = hi << 4 | lo
+    return bytes(packed)
 
 
 # Our expanded metadata to include more refined field-level definitions.
@@ -347,18 +388,29 @@ class XField(NamedTuple):
     precision: Optional[int]
     usage: Tuple[Callable, Callable]
 
-class XMetadata(NamedTuple):
+@dataclass(frozen=True)
+class XMetadata:
     fields: List[XField]
     reclen: int
     encoding: str
-
-    @property
-    def decode(self) -> Callable[[bytes], Tuple[str, int]]:
-        return codecs.getdecoder(self.encoding)
-
-    @property
-    def encode(self) -> Callable[[str], Tuple[bytes, int]]:
-        return codecs.getencoder(self.encoding)
+    decode: Callable[[bytes], Tuple[str, int]] = field(init=False, repr=False, compare=False)
+    encode: Callable[[str], Tuple[bytes, int]] = field(init=False, repr=False, compare=False)
+    field_encoders: List[Tuple[str, Encoder, XField]] = field(init=False, repr=False, compare=False)
+    field_decoders: List[Tuple[str, slice, Decoder, XField]] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        # The codecs are looked up once, not each time a field is converted.
+        object.__setattr__(self, "decode", codecs.getdecoder(self.encoding))
+        object.__setattr__(self, "encode", codecs.getencoder(self.encoding))
+        # Everything a record needs for each field is gathered into one
+        # tuple per field, so the per-record loops unpack instead of
+        # looking up attributes.
+        object.__setattr__(self, "field_encoders", [
+            (f.name, f.usage[0], f) for f in self.fields
+        ])
+        object.__setattr__(self, "field_decoders", [
+            (f.name, slice(f.offset, f.offset + f.length), f.usage[1], f) for f in self.fields
+        ])
 
 
 metadata_comp3 = XMetadata(
@@ -373,35 +425,39 @@ metadata_comp3 = XMetadata(
 )
 
 # A function to transform a namedtuple into a fixed-layout record.
+# As with the text records, the layout can be taken apart once per
+# XMetadata; the returned function only fetches and encodes values.
+def gamestat_record_comp3_formatter(metadata: XMetadata) -> Callable[[GameStat], bytes]:
+    values = attr_tuple_getter([name for name, encode, field in metadata.field_encoders])
+    encoders = [(encode, field) for name, encode, field in metadata.field_encoders]
+
+    def record(gamestat: GameStat) -> bytes:
+        text = b"".join(
+            [encode(value, metadata, field) for (encode, field), value in zip(encoders, values(gamestat))]
+        )
+        assert len(text) == metadata.reclen, f"Got {len(text)} != Should Be {metadata.reclen}"
+        return text
+
+    return record
+
+
+# A single record.
 def gamestat_record_comp3(gamestat: GameStat, metadata: XMetadata) -> bytes:
-    record = [
-        field.usage[0](getattr(gamestat, field.name), metadata, field)
-        for field in metadata.fields
-    ]
-    text = b"".join(record)
-    assert len(text) == metadata.reclen, "Got {0} != Should Be {1}".format(
-        len(text), metadata.reclen
-    )
-    return text
+    return gamestat_record_comp3_formatter(metadata)(gamestat)
 
 
 # Example encoding app.
-with (Path.cwd()/"data"/"ch10_blackjack_comp3.file").open("wb") as target:
-    for gamestat in gamestat_iter(Player_Strategy, Martingale_Bet):
-        data_bytes = gamestat_record_comp3(gamestat, metadata_comp3)
-        target.write(data_bytes)
+to_record_comp3 = gamestat_record_comp3_formatter(metadata_comp3)
+with (Path.cwd()/"data"/"ch10_blackjack_comp3.file").open("wb") as comp3_target:
+    comp3_target.writelines(map(to_record_comp3, gamestat_iter(Player_Strategy, Martingale_Bet)))
 
 # Example decoding iterator using more sophisticated metadata.
-def record2_iter(aFile: TextIO, metadata: XMetadata) -> Iterator[Dict[str, XField]]:
+def record2_iter(aFile: BinaryIO, metadata: XMetadata) -> Iterator[Dict[str, XField]]:
     for line in line_iter(aFile, metadata):
-        field_data = (
-            (field, line[field.offset:field.offset + field.length])
-            for field in metadata.fields
-        )
-        record = dict(
-            (field.name, field.usage[1](data, metadata, field))
-            for field, data in field_data
-        )
+        record = {
+            name: decode(line[where], metadata, field)
+            for name, where, decode, field in metadata.field_decoders
+        }
         yield record
 
 test_reader_2 = """
@@ -441,6 +497,27 @@ test_reader_2 = """
 
 """
 
+# With one field, attrgetter returns a bare value rather than a tuple;
+# the records of a one-field layout still have their one field.
+test_one_field = """
+    >>> gs = next(gamestat_iter(Player_Strategy, Martingale_Bet))
+    >>> metadata_1 = Metadata(fields=[FixedField("rounds", 0, 5, "{:>{size}d}")], reclen=5)
+    >>> text = gamestat_record(gs, metadata_1)
+    >>> text
+    '  100'
+    >>> list(record_iter(io.StringIO(text * 2), metadata_1))
+    [{'rounds': '100'}, {'rounds': '100'}]
+
+    >>> xmetadata_1 = XMetadata(
+    ...     fields=[XField("final", 0, 8, 2, usage_comp3)], reclen=8, encoding="ebcdic"
+    ... )
+    >>> data = gamestat_record_comp3(gs, xmetadata_1)
+    >>> data.hex()
+    '0000000000142000'
+    >>> list(record2_iter(io.BytesIO(data), xmetadata_1))
+    [{'final': Decimal('142.00')}]
+"""
+
 __test__ = {name: value for name, value in locals().items() if name.startswith("test_")}
 
 if __name__ == "__main__":
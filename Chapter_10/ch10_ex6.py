@@ -13,7 +13,7 @@ Chapter 10. Example 6. XML
 # A detail class for micro-blog posts
 import datetime
 from dataclasses import dataclass, field, asdict
-from typing import List, DefaultDict, Dict, Any
+from typing import List, DefaultDict, Dict, Any, IO, Union
 from collections import defaultdict
 import io
 from Chapter_10.ch10_ex1 import travel, rst_render
@@ -32,25 +32,40 @@ class Post_X:
     title: str
     rst_text: str
     tags: List[str]
-    underline: str = field(init=False)
-    tag_text: str = field(init=False)
 
-    def __post_init__(self) -> None:
-        self.underline = "-"*len(self.title)
-        self.tag_text = ' '.join(self.tags)
+    # The underline and tag text are only needed for RST output, so they're
+    # computed when asked for rather than for every post that's created.
+    @property
+    def underline(self) -> str:
+        return "-"*len(self.title)
+
+    @property
+    def tag_text(self) -> str:
+        return ' '.join(self.tags)
 
     def as_dict(self) -> Dict[str, Any]:
-        return asdict(self)
+        return dict(
+            date=self.date,
+            title=self.title,
+            rst_text=self.rst_text,
+            tags=list(self.tags),
+            underline=self.underline,
+            tag_text=self.tag_text,
+        )
+
+    # The pieces of text are appended to one list, shared by all the posts
+    # of a blog, and joined once. No intermediate string is built per post.
+    def _xml_fragments(self, out: List[str]) -> None:
+        out.extend(("<entry>\n    <title>", self.title, "</title>\n"))
+        out.extend(("    <date>", str(self.date), "</date>\n    <tags>"))
+        for t in self.tags:
+            out.extend(("<tag>", t, "</tag>"))
+        out.extend(("</tags>\n    <text>", self.rst_text, "</text>\n</entry>"))
 
     def xml(self) -> str:
-        tags = "".join(f"<tag>{t}</tag>" for t in self.tags)
-        return f"""\
-<entry>
-    <title>{self.title}</title>
-    <date>{self.date}</date>
-    <tags>{tags}</tags>
-    <text>{self.rst_text}</text>
-</entry>"""
+        out: List[str] = []
+        self._xml_fragments(out)
+        return "".join(out)
 
 
 from dataclasses import dataclass, field, asdict
@@ -70,22 +85,26 @@ class Blog_X:
     def by_tag(self) -> DefaultDict[str, List[Dict[str, Any]]]:
         tag_index: DefaultDict[str, List[Dict[str, Any]]] = defaultdict(list)
         for post in self.entries:
+            post_dict = post.as_dict()
             for tag in post.tags:
-                tag_index[tag].append(asdict(post))
+                tag_index[tag].append(post_dict)
         return tag_index
 
     def as_dict(self) -> Dict[str, Any]:
-        return asdict(self)
+        return dict(
+            title=self.title,
+            entries=[p.as_dict() for p in self.entries],
+            underline=self.underline,
+        )
 
     def xml(self) -> str:
-        children = "\n".join(c.xml() for c in self.entries)
-        return f"""\
-<blog><title>{self.title}</title>
-<entries>
-{children}
-<entries>
-</blog>
-"""
+        out = ["<blog><title>", self.title, "</title>\n<entries>\n"]
+        for n, c in enumerate(self.entries):
+            if n:
+                out.append("\n")
+            c._xml_fragments(out)
+        out.append("\n<entries>\n</blog>\n")
+        return "".join(out)
 
 
 travel4 = Blog_X("Travel")
@@ -129,7 +148,12 @@ test_xml_out_1 = """
 # Example 2: element Tree output
 # ##############################
 
-import xml.etree.ElementTree as XML
+# The lxml package, when it's installed, offers the same API with a C
+# implementation of tree building and serialization, over libxml2.
+try:
+    from lxml import etree as XML  # type: ignore
+except ImportError:
+    import xml.etree.ElementTree as XML  # type: ignore
 from typing import cast
 
 class Blog_E(Blog_X):
@@ -192,33 +216,39 @@ test_xml_out_2 = """
 
 """
 
-def build_blog(document: XML.ElementTree) -> Blog_X:
-    xml_blog = document.getroot()
-    blog = Blog_X(xml_blog.findtext("title"))
-    for xml_post in xml_blog.findall("entries/entry"):
-        optional_tag_iter = (
-            t.text for t in xml_post.findall("tags/tag")
-        )
-        tags = list(
-            filter(None, optional_tag_iter)
-        )
-        post = Post_X(
-            date=datetime.datetime.strptime(
-                xml_post.findtext("date"), "%Y-%m-%d %H:%M:%S"
-            ),
-            title=xml_post.findtext("title"),
-            tags=tags,
-            rst_text=xml_post.findtext("rst_text"),
-        )
-        blog.append(post)
-    return blog
+# The document is parsed incrementally. Each entry is built into a Post_X
+# as soon as its end tag is seen, then removed from its parent, so only one
+# entry's elements are held at a time. The stack of open elements tells the
+# blog's title apart from the titles of the entries, and gives each
+# element's parent; this works with both lxml and ElementTree.
+
+def build_blog(source: Union[str, IO]) -> Blog_X:
+    title = ""
+    posts: List[Post_X] = []
+    open_elements: List[Any] = []
+    for event, element in XML.iterparse(source, events=("start", "end")):
+        if event == "start":
+            open_elements.append(element)
+            continue
+        open_elements.pop()
+        if len(open_elements) == 1 and element.tag == "title":
+            title = element.text or ""
+        elif element.tag == "entry":
+            post = Post_X(
+                date=datetime.datetime.fromisoformat(element.findtext("date")),
+                title=element.findtext("title"),
+                tags=[t.text for t in element.iterfind("tags/tag") if t.text],
+                rst_text=element.findtext("rst_text"),
+            )
+            posts.append(post)
+            open_elements[-1].remove(element)
+    return Blog_X(title, posts)
 
 test_xml_in = """
     >>> tree = XML.ElementTree(travel5.xmlelt())
     >>> text = XML.tostring(tree.getroot())
 
-    >>> document = XML.parse(io.StringIO(text.decode("utf-8")))
-    >>> blog = build_blog(document)
+    >>> blog = build_blog(io.BytesIO(text))
     >>> rst_render(blog)  # doctest: +NORMALIZE_WHITESPACE
     Travel
     ======
@@ -17,6 +17,7 @@ import datetime
 from pathlib import Path
 from dataclasses import dataclass, asdict, field
 import shelve
+import pickle
 
 
 # Some Example Application Classes
@@ -49,8 +50,10 @@ class Blog:
     def by_tag(self) -> Dict[str, List[Dict[str, Any]]]:
         tag_index: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
         for post in self.entries:
+            # asdict() is a deep copy; one per post is shared by its tags.
+            post_dict = asdict(post)
             for tag in post.tags:
-                tag_index[tag].append(asdict(post))
+                tag_index[tag].append(post_dict)
         return tag_index
 
 test_blog = """
@@ -101,7 +104,7 @@ if __name__ == "__main__":
     # Some Manual access
     import shelve
 
-    shelf = shelve.open(str(Path.cwd() / "data" / "ch11_blog"))
+    shelf = shelve.open(str(Path.cwd() / "data" / "ch11_blog"), protocol=pickle.HIGHEST_PROTOCOL)
     db_id = 0
 
     # Typical seqence for saving...
@@ -142,7 +145,7 @@ if __name__ == "__main__":
         tags=["#RedRanger", "#Whitby42", "#Mistakes"],
     )
 
-    shelf = shelve.open(str(Path.cwd() / "data" / "ch11_blog"))
+    shelf = shelve.open(str(Path.cwd() / "data" / "ch11_blog"), protocol=pickle.HIGHEST_PROTOCOL)
 
     # Retrieve the blog by id
     blog_id = 1
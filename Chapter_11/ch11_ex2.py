@@ -7,7 +7,7 @@ Code Examples for Mastering Object-Oriented Python 2nd Edition
 Chapter 11. Example 2.
 """
 
-from typing import List, Dict, Any, Optional, cast, Iterator, Union, TextIO
+from typing import List, Dict, Any, Optional, cast, Iterator, Union, TextIO, Set
 import datetime
 from dataclasses import dataclass, field, asdict
 from pathlib import Path
@@ -35,6 +35,16 @@ class Post:
         self.underline = "-" * len(self.title)
         self.tag_text = " ".join(self.tags)
 
+    # The derived fields aren't saved; they're rebuilt when the post is loaded.
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        del state["underline"], state["tag_text"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self.__post_init__()
+
 @dataclass
 class Blog:
 
@@ -48,12 +58,23 @@ class Blog:
     def __post_init__(self) -> None:
         self.underline = "=" * len(self.title)
 
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        del state["underline"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self.__post_init__()
+
     def by_tag(self, access: 'Access') -> Dict[str, List[Dict[str, Any]]]:
         tag_index: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
         for post in access.post_iter(self):
             if post._blog_id == self._id:
+                # asdict() is a deep copy; one per post is shared by its tags.
+                post_dict = asdict(post)
                 for tag in post.tags:
-                    tag_index[tag].append(asdict(post))
+                    tag_index[tag].append(post_dict)
         return tag_index
 
 
@@ -105,6 +126,8 @@ test_relational_1 = """
 
 # We'll use hierarchical keys Post:id and Post:id:Child:id
 import shelve
+import pickle
+from collections import OrderedDict
 
 
 class OperationError(Exception):
@@ -113,24 +136,51 @@ class OperationError(Exception):
 
 class Access:
 
+    # Every shelf read unpickles a fresh object. With a cache_size set,
+    # retrieve_blog(), retrieve_post() and the index-driven iterators keep
+    # that many of the most recently used objects, so repeated reads of the
+    # same key are cheap. A cached object is shared: a change made to it
+    # without update_post() is seen by later reads, even though the shelf
+    # was never written. That's not how a shelf behaves, so the cache is off
+    # unless an application sets cache_size on its instance or a subclass.
+    # The full key scans below bypass the cache; they touch every object,
+    # and would only evict the useful entries.
+    cache_size = 0
+
     def __init__(self) -> None:
         self.database: shelve.Shelf = cast(shelve.Shelf, None)
         self.max: Dict[str, int] = {"Post": 0, "Blog": 0}
+        self._cache: "OrderedDict[str, Any]" = OrderedDict()
 
     def new(self, path: Path) -> None:
-        self.database: shelve.Shelf = shelve.open(str(path), "n")
+        self.database: shelve.Shelf = shelve.open(str(path), "n", protocol=pickle.HIGHEST_PROTOCOL)
         self.max: Dict[str, int] = {"Post": 0, "Blog": 0}
+        self._cache.clear()
         self.sync()
 
     def open(self, path: Path) -> None:
-        self.database = shelve.open(str(path), "w")
+        self.database = shelve.open(str(path), "w", protocol=pickle.HIGHEST_PROTOCOL)
         self.max = self.database["_DB:max"]
+        self._cache.clear()
 
     def close(self) -> None:
         if self.database:
             self.database["_DB:max"] = self.max
             self.database.close()
         self.database = cast(shelve.Shelf, None)
+        self._cache.clear()
+
+    def _get(self, key: str) -> Any:
+        if not self.cache_size:
+            return self.database[key]
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+        item = self.database[key]
+        self._cache[key] = item
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return item
 
     def sync(self) -> None:
         self.database["_DB:max"] = self.max
@@ -144,7 +194,7 @@ class Access:
         return blog
 
     def retrieve_blog(self, key: str) -> Blog:
-        return self.database[key]
+        return self._get(key)
 
     def create_post(self, blog: Blog, post: Post) -> Post:
         self.max['Post'] += 1
@@ -155,14 +205,16 @@ class Access:
         return post
 
     def retrieve_post(self, key: str) -> Post:
-        return self.database[key]
+        return self._get(key)
 
     def update_post(self, post: Post) -> Post:
         self.database[post._id] = post
+        self._cache.pop(post._id, None)
         return post
 
     def delete_post(self, post: Post) -> None:
         del self.database[post._id]
+        self._cache.pop(post._id, None)
 
     def __iter__(self) -> Iterator[Union[Blog, Post]]:
         for k in self.database:
@@ -179,8 +231,10 @@ class Access:
     def post_iter(self, blog: Blog) -> Iterator[Post]:
         for k in self.database:
             if k.startswith('Post:'):
-                if self.database[k]._blog_id == blog._id:
-                    yield self.database[k]
+                # Each lookup unpickles the post; do it only once.
+                post = self.database[k]
+                if post._blog_id == blog._id:
+                    yield post
 
     def post_title_iter(self, blog: Blog, title: str) -> Iterator[Post]:
         return (p for p in self.post_iter(blog) if p.title == title)
@@ -225,14 +279,26 @@ test_access = """
     Post:2 Post(date=datetime.datetime(2013, 11, 18, 15, 30), title='Anchor Follies', rst_text='Some witty epigram. Including ☺ and ☀︎︎', tags=['#RedRanger', '#Whitby42', '#Mistakes'], underline='--------------', tag_text='#RedRanger #Whitby42 #Mistakes')
 """
 
+test_access_cache = """
+    >>> with closing(Access()) as access:
+    ...     access.new(Path.cwd() / "data" / "ch11_cache")
+    ...     blog = access.create_blog(Blog(title="Travel Blog"))
+    ...     access.retrieve_blog(blog._id) is access.retrieve_blog(blog._id)
+    False
+    >>> with closing(Access()) as access:
+    ...     access.cache_size = 16
+    ...     access.open(Path.cwd() / "data" / "ch11_cache")
+    ...     access.retrieve_blog(blog._id) is access.retrieve_blog(blog._id)
+    True
+"""
+
 # Another Application
 # ==============================
 
 
-import string
 from collections import defaultdict
-from contextlib import redirect_stdout
 import sys
+import io
 
 class Render:
 
@@ -245,41 +311,74 @@ class Render:
             self.emit_blog(blog, destination)
 
     def emit_blog(self, blog: Blog, output: TextIO) -> None:
-        with redirect_stdout(output):
-            self.tag_index: Dict[str, List[str]] = defaultdict(list)
-            print("{title}\n{underline}\n".format(**asdict(blog)))
-            for post in self.access.post_iter(blog):
-                self.emit_post(post)
-                for tag in post.tags:
-                    self.tag_index[tag].append(post._id)
-            self.emit_index()
-
-    def emit_post(self, post: Post) -> None:
-        template = string.Template(
-            """
-        $title
-        $underline
-
-        $rst_text
-
-        :date: $date
-
-        :tags: $tag_text
+        # Collect the text in memory and write it once, rather than print()
+        # each line. The index keeps the titles, so it needn't retrieve the
+        # posts again.
+        buffer = io.StringIO()
+        self.tag_index: Dict[str, List[str]] = defaultdict(list)
+        buffer.write(f"{blog.title}\n{blog.underline}\n\n")
+        for post in self.access.post_iter(blog):
+            self.emit_post(post, buffer)
+            for tag in post.tags:
+                self.tag_index[tag].append(post.title)
+        self.emit_index(buffer)
+        output.write(buffer.getvalue())
+
+    # Without an output, these write to whatever sys.stdout is when they're
+    # called, as print() does.
+    def emit_post(self, post: Post, output: Optional[TextIO]=None) -> None:
+        if output is None:
+            output = sys.stdout
+        # Format the attributes directly; asdict() would deep-copy the post.
+        template = """
+        {title}
+        {underline}
+
+        {rst_text}
+
+        :date: {date}
+
+        :tags: {tag_text}
         """
+        output.write(
+            template.format(
+                title=post.title,
+                underline=post.underline,
+                rst_text=post.rst_text,
+                date=post.date,
+                tag_text=post.tag_text,
+            )
         )
-        print(template.substitute(asdict(post)))
+        output.write("\n")
 
-    def emit_index(self) -> None:
-        print("Tag Index")
-        print("=========")
-        print()
+    def emit_index(self, output: Optional[TextIO]=None) -> None:
+        if output is None:
+            output = sys.stdout
+        output.write("Tag Index\n=========\n\n")
         for tag in self.tag_index:
-            print("*   {0}".format(tag))
-            print()
-            for b in self.tag_index[tag]:
-                post = self.access.retrieve_post(b)
-                print("    -   `{title}`_".format(**asdict(post)))
-            print()
+            output.write(f"*   {tag}\n\n")
+            for title in self.tag_index[tag]:
+                output.write(f"    -   `{title}`_\n")
+            output.write("\n")
+
+
+test_render_stdout = """
+    >>> import contextlib
+    >>> renderer = Render(Access())
+    >>> renderer.tag_index = {"#ICW": ["Hard Aground"]}
+    >>> buffer = io.StringIO()
+    >>> with contextlib.redirect_stdout(buffer):
+    ...     renderer.emit_index()
+    >>> print(buffer.getvalue())
+    Tag Index
+    =========
+    <BLANKLINE>
+    *   #ICW
+    <BLANKLINE>
+        -   `Hard Aground`_
+    <BLANKLINE>
+    <BLANKLINE>
+"""
 
 
 # Demo Script
@@ -301,26 +400,63 @@ if __name__ == "__main__":
 
 class Access2(Access):
 
+    def __init__(self) -> None:
+        super().__init__()
+        # Blog index lists, read from the shelf once and kept in memory.
+        # The changed ones are written back by sync().
+        self._index: Dict[str, List[str]] = {}
+        self._changed_index: Set[str] = set()
+
+    # The lists belong to one database; start afresh with each one.
+    def new(self, path: Path) -> None:
+        self._index = {}
+        self._changed_index = set()
+        super().new(path)
+
+    def open(self, path: Path) -> None:
+        self._index = {}
+        self._changed_index = set()
+        super().open(path)
+
+    def close(self) -> None:
+        if self.database:
+            self.sync()
+        super().close()
+        self._index.clear()
+
+    def sync(self) -> None:
+        # Rewriting the whole index list for each new post is quadratic;
+        # write each changed list once.
+        for blog_index in self._changed_index:
+            self.database[blog_index] = self._index[blog_index]
+        self._changed_index.clear()
+        super().sync()
+
+    def _blog_index(self, blog_index: str) -> List[str]:
+        if blog_index not in self._index:
+            self._index[blog_index] = self.database.get(blog_index, [])
+        return self._index[blog_index]
+
     def create_post(self, blog: Blog, post: Post) -> Post:
         super().create_post(blog, post)
-        # Update the index; append doesn't work.
+        # Update the index; append doesn't work on the shelf, so
+        # append to the in-memory list until sync().
         blog_index = f"_Index:{blog._id}"
-        self.database.setdefault(blog_index, [])
-        self.database[blog_index] = self.database[blog_index] + [post._id]
+        self._blog_index(blog_index).append(post._id)
+        self._changed_index.add(blog_index)
         return post
 
     def delete_post(self, post: Post) -> None:
         super().delete_post(post)
         # Update the index
         blog_index = f"_Index:{post._blog_id}"
-        index_list = self.database[post._blog_id]
-        index_list.remove(post._id)
-        self.database[post._blog_id] = index_list
+        self._blog_index(blog_index).remove(post._id)
+        self._changed_index.add(blog_index)
 
     def post_iter(self, blog: Blog) -> Iterator[Post]:
         blog_index = f"_Index:{blog._id}"
-        for k in self.database[blog_index]:
-            yield self.database[k]
+        for k in list(self._blog_index(blog_index)):
+            yield self._get(k)
 
 
 test_access_2 = """
@@ -345,6 +481,43 @@ test_access_2 = """
     ...     renderer.emit_all()
 """
 
+test_access_2_delete = """
+    >>> with closing(Access2()) as access:
+    ...     access.new(Path.cwd() / "data" / "ch11_blog2")
+    ...     database_script(access)  # doctest: +ELLIPSIS
+    ...     access.delete_post(access.retrieve_post('Post:1'))
+    ...     print([p._id for p in access.post_iter(access.retrieve_blog('Blog:1'))])
+    Blog:1 ...
+    Post:1 ...
+    Post:2 ...
+    ['Post:2']
+
+    >>> with closing(Access2()) as access:
+    ...     access.open(Path.cwd() / "data" / "ch11_blog2")
+    ...     print(sorted(access.database.keys()))
+    ...     print(access.database['_Index:Blog:1'])
+    ['Blog:1', 'Post:2', '_DB:max', '_Index:Blog:1']
+    ['Post:2']
+"""
+
+test_access_2_new = """
+    >>> with closing(Access2()) as access:
+    ...     access.new(Path.cwd() / "data" / "ch11_blog2")
+    ...     database_script(access)  # doctest: +ELLIPSIS
+    ...     access.sync()
+    ...     access.database.close()
+    ...     access.new(Path.cwd() / "data" / "ch11_blog2")
+    ...     blog = access.create_blog(Blog(title="Another Blog"))
+    ...     print(list(access.post_iter(blog)))
+    ...     access.sync()
+    ...     print(sorted(access.database.keys()))
+    Blog:1 ...
+    Post:1 ...
+    Post:2 ...
+    []
+    ['Blog:1', '_DB:max']
+"""
+
 # Minor Index
 # ==========================
 
@@ -354,17 +527,36 @@ test_access_2 = """
 
 class Access3(Access2):
 
+    def __init__(self) -> None:
+        super().__init__()
+        # The blog index is kept in memory and written by sync().
+        self._blog_ids: List[str] = []
+
     def new(self, path: Path) -> None:
+        self._blog_ids = []
         super().new(path)
-        self.database["_Index:Blog"] = list()
+
+    def open(self, path: Path) -> None:
+        super().open(path)
+        self._blog_ids = self.database["_Index:Blog"]
+
+    def sync(self) -> None:
+        self.database["_Index:Blog"] = self._blog_ids
+        super().sync()
 
     def create_blog(self, blog: Blog) -> Blog:
         super().create_blog(blog)
-        self.database["_Index:Blog"] += [blog._id]
+        self._blog_ids.append(blog._id)
         return blog
 
+    def __iter__(self) -> Iterator[Union[Blog, Post]]:
+        # The indices name every object; there's no need to scan the keys.
+        for blog in self.blog_iter():
+            yield blog
+            yield from self.post_iter(blog)
+
     def blog_iter(self) -> Iterator[Blog]:
-        return (self.database[k] for k in self.database["_Index:Blog"])
+        return (self._get(k) for k in self._blog_ids)
 
 
 test_access_3 = """
@@ -397,22 +589,33 @@ test_access_3 = """
 # Is this really worth the extra complexity?
 class Access4(Access3):
 
+    def __init__(self) -> None:
+        super().__init__()
+        # The title index is kept in memory and written by sync().
+        self._title_index: Dict[str, List[str]] = {}
+
     def new(self, path: Path) -> None:
+        self._title_index = {}
         super().new(path)
-        self.database["_Index:Blog_Title"] = dict()
+
+    def open(self, path: Path) -> None:
+        super().open(path)
+        self._title_index = self.database["_Index:Blog_Title"]
+
+    def sync(self) -> None:
+        self.database["_Index:Blog_Title"] = self._title_index
+        super().sync()
 
     def create_blog(self, blog):
         super().create_blog(blog)
-        blog_title_dict = self.database["_Index:Blog_Title"]
-        blog_title_dict.setdefault(blog.title, [])
-        blog_title_dict[blog.title].append(blog._id)
-        self.database["_Index:Blog_Title"] = blog_title_dict
+        self._title_index.setdefault(blog.title, []).append(blog._id)
         return blog
 
     def update_blog(self, blog: Blog) -> Blog:
         """Replace this Blog; update index."""
         self.database[blog._id] = blog
-        blog_title = self.database["_Index:Blog_Title"]
+        self._cache.pop(blog._id, None)
+        blog_title = self._title_index
         # Remove key from index in old spot.
         empties = []
         for k in blog_title:
@@ -420,20 +623,15 @@ class Access4(Access3):
                 blog_title[k].remove(blog._id)
                 if len(blog_title[k]) == 0:
                     empties.append(k)
-        # Cleanup zero-length lists from defaultdict.
+        # Cleanup zero-length lists.
         for k in empties:
             del blog_title[k]
         # Put key into index in new spot.
-        blog_title[blog.title].append(blog._id)
-        self.database["_Index:Blog_Title"] = blog_title
+        blog_title.setdefault(blog.title, []).append(blog._id)
         return blog
 
-    def blog_iter(self) -> Iterator[Blog]:
-        return (self.database[k] for k in self.database["_Index:Blog"])
-
     def blog_title_iter(self, title: str) -> Iterator[Blog]:
-        blog_title = self.database["_Index:Blog_Title"]
-        return (self.database[k] for k in blog_title[title])
+        return (self._get(k) for k in self._title_index[title])
 
 
 test_access_4 = """